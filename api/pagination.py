@@ -0,0 +1,70 @@
+"""
+Keyset pagination shared by the list endpoints.
+
+Rows are ordered newest first on (created_at, id) and a page continues
+strictly after the last row of the previous one, so every page is an index
+range scan no matter how deep the client pages. The opaque cursor for the
+next page is returned in the X-Next-Cursor response header; its absence
+means this was the last page.
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Optional
+
+from fastapi import HTTPException, Query, Response, status
+from sqlalchemy import Select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    raw = json.dumps([created_at.isoformat(), row_id])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+class Page:
+    """limit/cursor and created_at range parameters, as a dependency."""
+
+    def __init__(
+            self,
+            limit: int = Query(50, ge=1, le=200),
+            cursor: Optional[str] = Query(None, description="Value of X-Next-Cursor from the previous page"),
+            created_after: Optional[datetime] = Query(None),
+            created_before: Optional[datetime] = Query(None),
+    ):
+        self.limit = limit
+        self.cursor = cursor
+        self.created_after = created_after
+        self.created_before = created_before
+
+
+async def paginate(db: AsyncSession, stmt: Select, model, page: Page, response: Response) -> list:
+    """Apply the page to `stmt` (a select of `model`) and return its rows."""
+    if page.created_after:
+        stmt = stmt.filter(model.created_at >= page.created_after)
+    if page.created_before:
+        stmt = stmt.filter(model.created_at < page.created_before)
+    if page.cursor:
+        created_at, row_id = decode_cursor(page.cursor)
+        stmt = stmt.filter(tuple_(model.created_at, model.id) < tuple_(created_at, row_id))
+
+    stmt = stmt.order_by(model.created_at.desc(), model.id.desc()).limit(page.limit + 1)
+    rows = (await db.execute(stmt)).scalars().all()
+
+    if len(rows) > page.limit:
+        rows = rows[:page.limit]
+        last = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last.created_at, last.id)
+    return rows
@@ -0,0 +1,43 @@
+"""
+Latency histogram for every HTTP request, labelled by route template
+(/services/{service_id}, not /services/42) so the number of series stays
+bounded. Requests that match no route are counted under "unmatched".
+
+Like ServerTimingMiddleware this is plain ASGI: WebSockets are not HTTP
+requests and are counted by the ws_connections gauge instead, and a
+streamed response (/events) is timed until the stream ends.
+"""
+
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from core import metrics
+
+
+class RequestMetricsMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # The router stores the matched route in the scope
+            route = scope.get("route")
+            metrics.http_request_duration.labels(
+                scope["method"], getattr(route, "path", "unmatched"), str(status_code),
+            ).observe(time.perf_counter() - started)
@@ -4,4 +4,5 @@ from .organization import router as organization_router
 from .team import router as team_router
 from .incident import router as incident_router
 from .users import router as users_router
-from .public import router as public_router
\ No newline at end of file
+from .public import router as public_router
+from .metrics import router as metrics_router
\ No newline at end of file
@@ -1,5 +1,11 @@
 from fastapi import APIRouter
 
+from core.auth import token_cache
+from core.broadcaster import broadcaster
+from core.coalescer import coalescer
+from core.history import history_compactor
+from core.outbox import outbox_relay
+
 router = APIRouter(
     prefix="/healthz",
     tags=["health"]
@@ -7,4 +13,19 @@ router = APIRouter(
 
 @router.get("/")
 def healthCheck():
-    return {"message": "Backend is working just fine"}
\ No newline at end of file
+    return {"message": "Backend is working just fine"}
+
+@router.get("/ws")
+def websocket_stats():
+    """Connection count and send-queue depth of the WebSocket fanout."""
+    return {**broadcaster.stats(), "coalescer": coalescer.stats(), "outbox": outbox_relay.stats()}
+
+@router.get("/history")
+def history_stats():
+    """Rows moved out of the status history by the compaction job."""
+    return history_compactor.stats()
+
+@router.get("/auth")
+def auth_stats():
+    """Hit/miss counters of the verified-token cache."""
+    return token_cache.stats()
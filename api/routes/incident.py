@@ -2,17 +2,33 @@
 
 import json
 from datetime import datetime
-from fastapi import APIRouter, Depends, status, HTTPException, Path, Body
-from sqlalchemy.orm import Session
+from typing import Optional
+from fastapi import APIRouter, Depends, status, HTTPException, Path, Body, Query, Request, Response
+from pydantic import ValidationError
+from sqlalchemy import insert, select, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
-from models.incident import Incident, IncidentUpdate as IncidentUpdateModel
+from models.incident import Incident, IncidentUpdate as IncidentUpdateModel, incident_services
+from models.service import Service
 from schemas.incident import (
     IncidentCreate,
+    IncidentImpact,
+    IncidentIngest,
+    IncidentIngestResponse,
+    IncidentIngestResult,
     IncidentResponse,
+    IncidentStatus,
+    IncidentType,
     IncidentUpdate,
+    IncidentUpdateResponse,
     IncidentWithUpdates,
 )
-from core.redis_client import redis_client
+from api.pagination import Page, paginate
+from core.config import settings
+from core.outbox import add_event, add_events, outbox_relay
+from db.query_budget import query_budget
 from db.session import get_db
 
 router = APIRouter(prefix="/incidents", tags=["incidents"])
@@ -25,7 +41,7 @@ router = APIRouter(prefix="/incidents", tags=["incidents"])
 )
 async def create_incident(
         payload: IncidentCreate = Body(...),
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_db),
 ):
     """
     Create a new Incident. service_ids is dropped if present.
@@ -38,8 +54,9 @@ async def create_incident(
     # Build and persist the Incident
     inc = Incident(**data)
     db.add(inc)
-    db.commit()
-    db.refresh(inc)
+    await db.flush()
+    # Load the server-side defaults (created_at) for the event below
+    await db.refresh(inc)
 
     # TODO: if you need to link to services, handle `service_ids` here
 
@@ -52,30 +69,210 @@ async def create_incident(
         "type": inc.type,
         "status": inc.status,
         "impact": inc.impact,
+        "organization_id": inc.organization_id,
+        # Routes the event to service-scoped subscribers; nothing is linked yet
+        "service_ids": [],
         "created_at": inc.created_at.isoformat(),
     }
-    await redis_client.publish("status_updates", json.dumps(event))
+    add_event(db, event)
+    await db.commit()
+    outbox_relay.notify()
 
     return inc
 
 
+def _parse_alerts(body: bytes, content_type: str) -> list:
+    """
+    The items of a JSON array (or a single object), or of an NDJSON body
+    with one alert per line. A line that is not valid JSON becomes its
+    exception, so it is reported as an invalid item rather than failing the
+    whole batch.
+    """
+    if "ndjson" in content_type or "jsonl" in content_type:
+        items = []
+        for line in body.splitlines():
+            if not line.strip():
+                continue
+            try:
+                items.append(json.loads(line))
+            except ValueError as e:
+                items.append(e)
+        return items
+    try:
+        items = json.loads(body)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Malformed JSON body: {e}")
+    if isinstance(items, dict):
+        return [items]
+    if not isinstance(items, list):
+        raise HTTPException(status_code=400, detail="Expected a JSON array or object")
+    return items
+
+
+def _validation_error(e: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+
+
+@router.post(
+    "/ingest",
+    response_model=IncidentIngestResponse,
+)
+async def ingest_incidents(
+        request: Request,
+        db: AsyncSession = Depends(get_db),
+):
+    """
+    Create incidents from a batch of alerts, sent as a JSON array or as
+    NDJSON (Content-Type: application/x-ndjson). Alerts are deduplicated on
+    their fingerprint: while an incident with that fingerprint is open,
+    repeats are reported as duplicates of it. Everything is written with
+    multi-row INSERTs in one transaction. Results come back per item.
+    No authentication required.
+    """
+    items = _parse_alerts(await request.body(), request.headers.get("content-type", ""))
+    if len(items) > settings.INCIDENT_INGEST_MAX_BATCH:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {settings.INCIDENT_INGEST_MAX_BATCH} alerts per request",
+        )
+
+    results: list[IncidentIngestResult] = []
+    alerts: dict[str, tuple[int, IncidentIngest]] = {}  # first alert per fingerprint
+    for index, item in enumerate(items):
+        if isinstance(item, ValueError):
+            results.append(IncidentIngestResult(index=index, result="invalid", error=f"Malformed JSON: {item}"))
+            continue
+        try:
+            alert = IncidentIngest.model_validate(item)
+        except ValidationError as e:
+            results.append(IncidentIngestResult(index=index, result="invalid", error=_validation_error(e)))
+            continue
+        alerts.setdefault(alert.fingerprint, (index, alert))
+        results.append(IncidentIngestResult(index=index, result="duplicate", fingerprint=alert.fingerprint))
+
+    now = datetime.utcnow()
+    insert_for = postgresql.insert if db.bind.dialect.name == "postgresql" else sqlite.insert
+    created: dict[str, int] = {}
+    rows = [
+        {**alert.model_dump(exclude={"service_ids"}), "created_at": now}
+        for _, alert in alerts.values()
+    ]
+    if rows:
+        # One cached statement; SQLAlchemy sends it as multi-row VALUES batches
+        stmt = (
+            insert_for(Incident)
+            .on_conflict_do_nothing(index_elements=["fingerprint"], index_where=text("status != 'resolved'"))
+            .returning(Incident.id, Incident.fingerprint)
+        )
+        result = await db.execute(stmt, rows, execution_options={"insertmanyvalues_page_size": settings.INCIDENT_INGEST_CHUNK})
+        created = {fingerprint: id_ for id_, fingerprint in result}
+
+    # Alerts that hit an open incident report its id
+    existing = {}
+    conflicted = [fingerprint for fingerprint in alerts if fingerprint not in created]
+    if conflicted:
+        existing = dict((await db.execute(
+            select(Incident.fingerprint, Incident.id)
+            .filter(Incident.fingerprint.in_(conflicted), Incident.status != "resolved")
+        )).all())
+
+    links = {
+        (created[fingerprint], service_id)
+        for fingerprint, (_, alert) in alerts.items() if fingerprint in created
+        for service_id in alert.service_ids
+    }
+    linked: dict[int, list[int]] = {}
+    if links:
+        known = set((await db.execute(
+            select(Service.id).filter(Service.id.in_({service_id for _, service_id in links}))
+        )).scalars())
+        links = sorted(link for link in links if link[1] in known)
+        if links:
+            await db.execute(insert(incident_services), [
+                {"incident_id": incident_id, "service_id": service_id} for incident_id, service_id in links
+            ])
+        for incident_id, service_id in links:
+            linked.setdefault(incident_id, []).append(service_id)
+
+    await add_events(db, [
+        {
+            "event_type": "incident",
+            "id": created[fingerprint],
+            "title": alert.title,
+            "description": alert.description,
+            "type": alert.type,
+            "status": alert.status,
+            "impact": alert.impact,
+            "organization_id": alert.organization_id,
+            "service_ids": linked.get(created[fingerprint], []),
+            "created_at": now.isoformat(),
+        }
+        for fingerprint, (_, alert) in alerts.items() if fingerprint in created
+    ])
+    await db.commit()
+    if created:
+        outbox_relay.notify()
+
+    first = {index: fingerprint for fingerprint, (index, _) in alerts.items()}
+    for item in results:
+        if item.fingerprint is None:
+            continue
+        if first.get(item.index) in created:
+            item.result = "created"
+            item.id = created[item.fingerprint]
+        else:
+            item.id = existing.get(item.fingerprint) or created.get(item.fingerprint)
+
+    return IncidentIngestResponse(
+        received=len(items),
+        created=len(created),
+        duplicates=sum(item.result == "duplicate" for item in results),
+        invalid=sum(item.result == "invalid" for item in results),
+        results=results,
+    )
+
+
 @router.get(
     "/",
     response_model=list[IncidentResponse],
 )
-def list_incidents(db: Session = Depends(get_db)):
-    return db.query(Incident).all()
+async def list_incidents(
+        response: Response,
+        page: Page = Depends(),
+        status: Optional[IncidentStatus] = Query(None),
+        type: Optional[IncidentType] = Query(None),
+        impact: Optional[IncidentImpact] = Query(None),
+        organization_id: Optional[int] = Query(None),
+        db: AsyncSession = Depends(get_db),
+):
+    stmt = select(Incident)
+    if status:
+        stmt = stmt.filter(Incident.status == status)
+    if type:
+        stmt = stmt.filter(Incident.type == type)
+    if impact:
+        stmt = stmt.filter(Incident.impact == impact)
+    if organization_id is not None:
+        stmt = stmt.filter(Incident.organization_id == organization_id)
+    return await paginate(db, stmt, Incident, page, response)
 
 
 @router.get(
     "/{incident_id}",
     response_model=IncidentWithUpdates,
+    dependencies=[Depends(query_budget(3))],
 )
-def get_incident(
+async def get_incident(
         incident_id: int = Path(..., gt=0),
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_db),
 ):
-    inc = db.get(Incident, incident_id)
+    # Lazy loading is not available on an AsyncSession, so pull the
+    # updates and affected services in up front.
+    inc = await db.get(
+        Incident,
+        incident_id,
+        options=[selectinload(Incident.updates), selectinload(Incident.services)],
+    )
     if not inc:
         raise HTTPException(status_code=404, detail="Incident not found")
     return inc
@@ -88,17 +285,15 @@ def get_incident(
 async def update_incident(
         payload: IncidentUpdate = Body(...),
         incident_id: int = Path(..., gt=0),
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_db),
 ):
-    inc = db.get(Incident, incident_id)
+    inc = await db.get(Incident, incident_id, options=[selectinload(Incident.services)])
     if not inc:
         raise HTTPException(status_code=404, detail="Incident not found")
 
     for field, val in payload.model_dump(exclude_unset=True).items():
         setattr(inc, field, val)
     inc.updated_at = datetime.utcnow()
-    db.commit()
-    db.refresh(inc)
 
     event = {
         "event_type": "incident",
@@ -108,9 +303,14 @@ async def update_incident(
         "type": inc.type,
         "status": inc.status,
         "impact": inc.impact,
+        "organization_id": inc.organization_id,
+        "service_ids": [service.id for service in inc.services],
         "updated_at": inc.updated_at.isoformat(),
     }
-    await redis_client.publish("status_updates", json.dumps(event))
+    add_event(db, event)
+    await db.commit()
+    await db.refresh(inc)
+    outbox_relay.notify()
 
     return inc
 
@@ -119,28 +319,40 @@ async def update_incident(
     "/{incident_id}",
     status_code=status.HTTP_204_NO_CONTENT,
 )
-def delete_incident(
+async def delete_incident(
         incident_id: int,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_db),
 ):
-    inc = db.get(Incident, incident_id)
+    inc = await db.get(Incident, incident_id, options=[selectinload(Incident.services)])
     if not inc:
         raise HTTPException(status_code=404, detail="Incident not found")
-    db.delete(inc)
-    db.commit()
+    service_ids = [service.id for service in inc.services]
+    await db.delete(inc)
+
+    event = {
+        "event_type": "incident",
+        "id": incident_id,
+        "organization_id": inc.organization_id,
+        "service_ids": service_ids,
+        "deleted": True,
+    }
+    add_event(db, event)
+    await db.commit()
+    outbox_relay.notify()
 
 
 @router.get(
     "/{incident_id}/updates",
-    response_model=list[IncidentResponse],
+    response_model=list[IncidentUpdateResponse],
 )
-def list_incident_updates(
+async def list_incident_updates(
         incident_id: int,
-        db: Session = Depends(get_db),
+        response: Response,
+        page: Page = Depends(),
+        status: Optional[IncidentStatus] = Query(None),
+        db: AsyncSession = Depends(get_db),
 ):
-    return (
-        db.query(IncidentUpdateModel)
-        .filter(IncidentUpdateModel.incident_id == incident_id)
-        .order_by(IncidentUpdateModel.created_at.desc())
-        .all()
-    )
+    stmt = select(IncidentUpdateModel).filter(IncidentUpdateModel.incident_id == incident_id)
+    if status:
+        stmt = stmt.filter(IncidentUpdateModel.status == status)
+    return await paginate(db, stmt, IncidentUpdateModel, page, response)
@@ -0,0 +1,11 @@
+from fastapi import APIRouter, Response
+
+from core import metrics
+
+router = APIRouter(tags=["metrics"])
+
+@router.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    """Prometheus exposition of every metric in core/metrics.py."""
+    body, content_type = metrics.render()
+    return Response(body, media_type=content_type)
@@ -1,7 +1,9 @@
 # app/api/routes/organization.py
-from fastapi import APIRouter, Depends, HTTPException, status, Path
-from sqlalchemy.orm import Session, selectinload
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, status, Path, Query, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from typing import List, Optional
 from slugify import slugify
 from uuid import uuid4
 
@@ -14,6 +16,8 @@ from schemas.organization import (
     OrganizationUpdate,
     OrganizationWithDetails,
 )
+from api.pagination import Page, paginate
+from db.query_budget import query_budget
 from db.session import get_db
 
 router = APIRouter(
@@ -21,10 +25,10 @@ router = APIRouter(
     tags=["organizations"]
 )
 
-def generate_unique_slug(base_slug: str, db: Session):
+async def generate_unique_slug(base_slug: str, db: AsyncSession):
     slug = base_slug
     counter = 1
-    while db.query(Organization).filter(Organization.slug == slug).first():
+    while await db.scalar(select(Organization.id).filter(Organization.slug == slug).limit(1)):
         slug = f"{base_slug}-{counter}"
         counter += 1
     return slug
@@ -34,33 +38,41 @@ def generate_unique_slug(base_slug: str, db: Session):
     response_model=OrganizationResponse,
     status_code=status.HTTP_201_CREATED,
 )
-def create_organization(
+async def create_organization(
         payload: OrganizationCreate,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_db),
 ):
     org = Organization(**payload.dict())
     db.add(org)
-    db.commit()
-    db.refresh(org)
+    await db.commit()
+    await db.refresh(org)
     return org
 
 @router.get("/", response_model=List[OrganizationResponse])
-def list_organizations(db: Session = Depends(get_db)):
-    return db.query(Organization).all()
+async def list_organizations(
+        response: Response,
+        page: Page = Depends(),
+        is_active: Optional[bool] = Query(None),
+        db: AsyncSession = Depends(get_db),
+):
+    stmt = select(Organization)
+    if is_active is not None:
+        stmt = stmt.filter(Organization.is_active == is_active)
+    return await paginate(db, stmt, Organization, page, response)
 
 @router.get(
     "/{org_id}",
     response_model=OrganizationWithDetails,
+    dependencies=[Depends(query_budget(2))],
 )
-def get_organization(
+async def get_organization(
         org_id: int = Path(..., gt=0),
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_db),
 ):
-    org = (
-        db.query(Organization)
+    org = await db.scalar(
+        select(Organization)
         .options(selectinload(Organization.teams))
         .filter(Organization.id == org_id)
-        .first()
     )
     if not org:
         raise HTTPException(
@@ -71,12 +83,12 @@ def get_organization(
 
 
 @router.patch("/{org_id}", response_model=OrganizationResponse)
-def update_organization(
+async def update_organization(
         org_id: int,
         payload: OrganizationUpdate,
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_db)
 ):
-    org = db.get(Organization, org_id)
+    org = await db.get(Organization, org_id)
     if not org:
         raise HTTPException(status_code=404, detail="Organization not found")
 
@@ -85,20 +97,20 @@ def update_organization(
     # If name is changed, update slug too
     if "name" in update_data:
         base_slug = slugify(update_data["name"])
-        new_slug = generate_unique_slug(base_slug, db)
+        new_slug = await generate_unique_slug(base_slug, db)
         update_data["slug"] = new_slug
 
     for field, value in update_data.items():
         setattr(org, field, value)
 
-    db.commit()
-    db.refresh(org)
+    await db.commit()
+    await db.refresh(org)
     return org
 
 @router.delete("/{org_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_organization(org_id: int, db: Session = Depends(get_db)):
-    org = db.get(Organization, org_id)
+async def delete_organization(org_id: int, db: AsyncSession = Depends(get_db)):
+    org = await db.get(Organization, org_id)
     if not org:
         raise HTTPException(status_code=404, detail="Organization not found")
-    db.delete(org)
-    db.commit()
+    await db.delete(org)
+    await db.commit()
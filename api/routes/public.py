@@ -1,43 +1,104 @@
-from datetime import datetime
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from typing import List
+from datetime import timezone
+from email.utils import format_datetime
+from fastapi import APIRouter, Depends, Query, Request, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 
+from core.config import settings
+from core.status_cache import DatasetVersions, status_cache
+from core.uptime import MAX_DAYS, service_uptime
 from db.session import get_db
 from models.incident import Incident
 from models.service import Service
 from schemas.public import PublicIncident, PublicService, PublicStatus
+from schemas.service import ServiceUptime
 
 router = APIRouter(prefix="/public", tags=["public"])
 
+CACHE_CONTROL = (
+    f"public, max-age={settings.PUBLIC_CACHE_MAX_AGE}, "
+    f"stale-while-revalidate={settings.PUBLIC_CACHE_STALE_WHILE_REVALIDATE}"
+)
+
+
+def _cache_headers(versions: DatasetVersions, dataset: str) -> dict:
+    headers = {"ETag": versions.etag(dataset), "Cache-Control": CACHE_CONTROL}
+    changed_at = versions.changed_at[dataset]
+    if changed_at:
+        headers["Last-Modified"] = format_datetime(changed_at.replace(tzinfo=timezone.utc), usegmt=True)
+    return headers
+
+
+def _not_modified(request: Request, etag: str) -> bool:
+    """If-None-Match check; conditional requests are answered from the ETag alone."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = {tag.strip() for tag in header.split(",")}
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
 
 @router.get("/incidents", response_model=List[PublicIncident])
-def list_public_incidents(db: Session = Depends(get_db)):
-    incidents = (
-        db.query(Incident)
+async def list_public_incidents(
+        request: Request,
+        response: Response,
+        db: AsyncSession = Depends(get_db),
+):
+    versions = await status_cache.versions(db)
+    headers = _cache_headers(versions, "incidents")
+    if _not_modified(request, headers["ETag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    response.headers.update(headers)
+    result = await db.execute(
+        select(Incident)
         .order_by(Incident.created_at.desc())
         .limit(10)
-        .all()
     )
-    return incidents
+    return result.scalars().all()
 
 
 @router.get("/services", response_model=List[PublicService])
-def list_public_services(db: Session = Depends(get_db)):
-    services = db.query(Service).all()
-    return services
+async def list_public_services(
+        request: Request,
+        response: Response,
+        db: AsyncSession = Depends(get_db),
+):
+    versions = await status_cache.versions(db)
+    headers = _cache_headers(versions, "services")
+    if _not_modified(request, headers["ETag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    response.headers.update(headers)
+    result = await db.execute(select(Service))
+    return result.scalars().all()
 
 
 @router.get("/status", response_model=PublicStatus)
-def get_public_status(db: Session = Depends(get_db)):
-    services = db.query(Service).all()
-    incidents = (
-        db.query(Incident)
-        .filter(Incident.status != "resolved")
-        .all()
-    )
-    return PublicStatus(
-        services=services,
-        incidents=incidents,
-        updated_at=datetime.utcnow(),
-    )
+async def get_public_status(request: Request, db: AsyncSession = Depends(get_db)):
+    # Served from the pre-encoded snapshot; the DB is only hit on a cold cache
+    versions = await status_cache.versions(db)
+    headers = _cache_headers(versions, "status")
+    if _not_modified(request, headers["ETag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    body = await status_cache.get(db, versions)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@router.get("/uptime", response_model=List[ServiceUptime])
+async def get_public_uptime(
+        response: Response,
+        days: int = Query(MAX_DAYS, ge=1, le=MAX_DAYS),
+        organization_id: Optional[int] = Query(None),
+        db: AsyncSession = Depends(get_db),
+):
+    """Uptime bars for every service (or one organization's)."""
+    service_ids = None
+    if organization_id is not None:
+        rows = await db.execute(select(Service.id).filter(Service.organization_id == organization_id))
+        service_ids = rows.scalars().all()
+    # Today's bar keeps moving, so this is cached by age rather than by ETag
+    response.headers["Cache-Control"] = f"public, max-age={settings.PUBLIC_UPTIME_MAX_AGE}"
+    return await service_uptime(db, service_ids, days)
@@ -1,13 +1,27 @@
 # File: api/routes/services.py
 
-import json
 from datetime import datetime
-from fastapi import APIRouter, Depends, status, HTTPException, Path, Body
-from sqlalchemy.orm import Session
+from typing import Optional
+from fastapi import APIRouter, Depends, status, HTTPException, Path, Body, Query, Response
+from sqlalchemy import case, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from models.service import Service, ServiceStatusUpdate
-from schemas.service import ServiceCreate, ServiceResponse, ServiceUpdate
-from core.redis_client import redis_client
+from schemas.service import (
+    BulkStatusResponse,
+    BulkStatusResult,
+    BulkStatusUpdate,
+    ServiceCreate,
+    ServiceResponse,
+    ServiceStatus,
+    ServiceStatusHistoryResponse,
+    ServiceUpdate,
+    ServiceUptime,
+)
+from api.pagination import Page, paginate
+from core.outbox import add_event, outbox_relay
+from core.rollups import record_status, record_statuses
+from core.uptime import MAX_DAYS, service_uptime
 from db.session import get_db
 from core.auth import verify_clerk_token
 
@@ -20,7 +34,7 @@ router = APIRouter(prefix="/services", tags=["services"])
 )
 async def create_service(
         service_in: ServiceCreate,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_db),
 ):
     # 1. Derive a slug from the name
     slug_value = service_in.name.strip().lower().replace(" ", "-")
@@ -34,32 +48,26 @@ async def create_service(
         current_status=service_in.current_status,
     )
     db.add(svc)
-    db.commit()
-    db.refresh(svc)
+    await db.flush()
 
     # 3. Record an initial status update WITH timestamps
     now = datetime.utcnow()
-    status_record = ServiceStatusUpdate(
-        service_id=svc.id,
-        status=svc.current_status,
-        message=None,
-        created_by=None,
-        created_at=now,
-        updated_at=now,             # ← ensure this is never NULL
-    )
-    db.add(status_record)
-    db.commit()
+    await record_status(db, svc.id, svc.current_status, at=now)
 
-    # 4. Broadcast via Redis
+    # 4. Broadcast via the outbox, committed together with the service
     event = {
         "event_type": "service",
         "id": svc.id,
+        "organization_id": svc.organization_id,
         "name": svc.name,
         "slug": svc.slug,
         "current_status": svc.current_status,
         "updated_at": now.isoformat(),
     }
-    await redis_client.publish("status_updates", json.dumps(event))
+    add_event(db, event)
+    await db.commit()
+    await db.refresh(svc)
+    outbox_relay.notify()
 
     return svc
 
@@ -68,11 +76,19 @@ async def create_service(
     response_model=list[ServiceResponse],
 )
 async def list_services(
-        db: Session = Depends(get_db),
+        response: Response,
+        page: Page = Depends(),
+        status: Optional[ServiceStatus] = Query(None),
+        organization_id: Optional[int] = Query(None),
+        db: AsyncSession = Depends(get_db),
         token_payload: dict = Depends(verify_clerk_token),
 ):
-    # No org_id filtering—just return everything
-    return db.query(Service).all()
+    stmt = select(Service)
+    if status:
+        stmt = stmt.filter(Service.current_status == status)
+    if organization_id is not None:
+        stmt = stmt.filter(Service.organization_id == organization_id)
+    return await paginate(db, stmt, Service, page, response)
 
 
 @router.get(
@@ -81,10 +97,10 @@ async def list_services(
 )
 async def get_service(
         service_id: int = Path(..., gt=0),
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_db),
         token_payload: dict = Depends(verify_clerk_token),
 ):
-    service = db.get(Service, service_id)
+    service = await db.get(Service, service_id)
     if not service:
         raise HTTPException(status_code=404, detail="Service not found")
     return service
@@ -98,13 +114,13 @@ async def get_service(
 async def update_service(
         payload: ServiceUpdate = Body(...),
         service_id: int = Path(..., gt=0),
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_db),
 ):
     """
     Update an existing Service. Fields in `payload` that are unset will be left intact.
     No authentication required.
     """
-    svc = db.get(Service, service_id)
+    svc = await db.get(Service, service_id)
     if not svc:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -112,23 +128,30 @@ async def update_service(
         )
 
     # Apply only the provided fields
+    previous_status = svc.current_status
     for field, value in payload.model_dump(exclude_unset=True).items():
         setattr(svc, field, value)
 
+    # Status changes feed the uptime history like POST /{id}/status does
+    if svc.current_status != previous_status:
+        await record_status(db, svc.id, svc.current_status)
+
     svc.updated_at = datetime.utcnow()
-    db.commit()
-    db.refresh(svc)
 
     # Broadcast the update event
     event = {
         "event_type": "service",
         "id": svc.id,
+        "organization_id": svc.organization_id,
         "name": svc.name,
         "slug": svc.slug,
         "current_status": svc.current_status,
         "updated_at": svc.updated_at.isoformat(),
     }
-    await redis_client.publish("status_updates", json.dumps(event))
+    add_event(db, event)
+    await db.commit()
+    await db.refresh(svc)
+    outbox_relay.notify()
 
     return svc
 
@@ -138,14 +161,99 @@ async def update_service(
 )
 async def delete_service(
         service_id: int,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_db),
         token_payload: dict = Depends(verify_clerk_token),
 ):
-    service = db.get(Service, service_id)
+    service = await db.get(Service, service_id)
     if not service:
         raise HTTPException(status_code=404, detail="Service not found")
-    db.delete(service)
-    db.commit()
+    await db.delete(service)
+
+    event = {
+        "event_type": "service",
+        "id": service_id,
+        "organization_id": service.organization_id,
+        "deleted": True,
+    }
+    add_event(db, event)
+    await db.commit()
+    outbox_relay.notify()
+
+
+@router.post(
+    "/status:bulk",
+    response_model=BulkStatusResponse,
+)
+async def bulk_update_service_status(
+        payload: BulkStatusUpdate,
+        db: AsyncSession = Depends(get_db),
+        token_payload: dict = Depends(verify_clerk_token),
+):
+    """
+    Set the status of many services in one transaction: one set-based
+    UPDATE, one multi-row history INSERT and one outbox batch. Unknown or
+    repeated services are reported per item and do not fail the request.
+    """
+    user_id = token_payload.get("user_id")
+    if not user_id:
+        raise HTTPException(status_code=401, detail="Authentication required")
+
+    requested = {}
+    for item in payload.updates:
+        requested.setdefault(item.service_id, item)
+    services = {
+        svc.id: svc for svc in (await db.execute(
+            select(Service.id, Service.organization_id, Service.name, Service.slug)
+            .filter(Service.id.in_(list(requested)))
+            .order_by(Service.id)
+            .with_for_update()
+        )).all()
+    }
+
+    results = []
+    for item in payload.updates:
+        if item.service_id not in services:
+            error = "Service not found"
+        elif requested[item.service_id] is not item:
+            error = "Duplicate service_id in request"
+        else:
+            results.append(BulkStatusResult(service_id=item.service_id, ok=True, current_status=item.status))
+            continue
+        results.append(BulkStatusResult(service_id=item.service_id, ok=False, error=error))
+
+    changes = {sid: item for sid, item in requested.items() if sid in services}
+    if changes:
+        now = datetime.utcnow()
+        await db.execute(
+            update(Service)
+            .filter(Service.id.in_(list(changes)))
+            .values(
+                current_status=case({sid: item.status for sid, item in changes.items()}, value=Service.id),
+                updated_at=now,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        await record_statuses(
+            db,
+            {sid: (item.status, item.message) for sid, item in changes.items()},
+            created_by=user_id,
+            at=now,
+        )
+        for sid, item in changes.items():
+            svc = services[sid]
+            add_event(db, {
+                "event_type": "service",
+                "id": sid,
+                "organization_id": svc.organization_id,
+                "name": svc.name,
+                "slug": svc.slug,
+                "current_status": item.status,
+                "updated_at": now.isoformat(),
+            })
+        await db.commit()
+        outbox_relay.notify()
+
+    return BulkStatusResponse(updated=len(changes), results=results)
 
 
 @router.post(
@@ -155,51 +263,67 @@ async def delete_service(
 async def create_service_status_update(
         service_id: int,
         payload: ServiceUpdate,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_db),
         token_payload: dict = Depends(verify_clerk_token),
 ):
     user_id = token_payload.get("user_id")
     if not user_id:
         raise HTTPException(status_code=401, detail="Authentication required")
 
-    status_record = ServiceStatusUpdate(
-        service_id=service_id,
-        status=payload.current_status,
-        created_by=user_id,
-    )
-    db.add(status_record)
+    service = await db.get(Service, service_id)
+    if not service:
+        raise HTTPException(status_code=404, detail="Service not found")
+    await record_status(db, service_id, payload.current_status, created_by=user_id)
 
-    service = db.get(Service, service_id)
     service.current_status = payload.current_status
     service.updated_at = datetime.utcnow()
-    db.commit()
-    db.refresh(service)
 
     event = {
         "event_type": "service",
         "id": service.id,
+        "organization_id": service.organization_id,
         "name": service.name,
         "slug": service.slug,
         "current_status": service.current_status,
         "updated_at": service.updated_at.isoformat(),
     }
-    await redis_client.publish("status_updates", json.dumps(event))
+    add_event(db, event)
+    await db.commit()
+    await db.refresh(service)
+    outbox_relay.notify()
 
     return service
 
 
 @router.get(
     "/{service_id}/status/history",
-    response_model=list[ServiceResponse],
+    response_model=list[ServiceStatusHistoryResponse],
 )
 async def list_service_status_history(
         service_id: int,
-        db: Session = Depends(get_db),
+        response: Response,
+        page: Page = Depends(),
+        status: Optional[ServiceStatus] = Query(None),
+        db: AsyncSession = Depends(get_db),
         token_payload: dict = Depends(verify_clerk_token),
 ):
-    return (
-        db.query(ServiceStatusUpdate)
-        .filter(ServiceStatusUpdate.service_id == service_id)
-        .order_by(ServiceStatusUpdate.created_at.desc())
-        .all()
-    )
+    stmt = select(ServiceStatusUpdate).filter(ServiceStatusUpdate.service_id == service_id)
+    if status:
+        stmt = stmt.filter(ServiceStatusUpdate.status == status)
+    return await paginate(db, stmt, ServiceStatusUpdate, page, response)
+
+
+@router.get(
+    "/{service_id}/uptime",
+    response_model=ServiceUptime,
+)
+async def get_service_uptime(
+        service_id: int = Path(..., gt=0),
+        days: int = Query(MAX_DAYS, ge=1, le=MAX_DAYS),
+        db: AsyncSession = Depends(get_db),
+        token_payload: dict = Depends(verify_clerk_token),
+):
+    results = await service_uptime(db, [service_id], days)
+    if not results:
+        raise HTTPException(status_code=404, detail="Service not found")
+    return results[0]
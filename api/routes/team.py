@@ -1,12 +1,16 @@
 # app/api/routes/team.py
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 from typing import List
 
 from models.team import Team
 from schemas.team import TeamCreate, TeamResponse, TeamUpdate, TeamWithMembers
 from schemas.user import UserResponse
 from schemas import BaseResponse
+from api.pagination import Page, paginate
+from db.query_budget import query_budget
 from db.session import get_db
 
 router = APIRouter(
@@ -15,64 +19,68 @@ router = APIRouter(
 )
 
 @router.post("/", response_model=TeamResponse, status_code=status.HTTP_201_CREATED)
-def create_team(
+async def create_team(
         org_id: int,
         payload: TeamCreate,
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_db)
 ):
     # ensure the organization exists
     from models.organization import Organization
-    if not db.get(Organization, org_id):
+    if not await db.get(Organization, org_id):
         raise HTTPException(status_code=404, detail="Organization not found")
     team = Team(**payload.dict())
     db.add(team)
-    db.commit()
-    db.refresh(team)
+    await db.commit()
+    await db.refresh(team)
     return team
 
 @router.get("/", response_model=List[TeamResponse])
-def list_teams(org_id: int, db: Session = Depends(get_db)):
-    return db.query(Team).filter(Team.organization_id == org_id).all()
+async def list_teams(
+        org_id: int,
+        response: Response,
+        page: Page = Depends(),
+        db: AsyncSession = Depends(get_db),
+):
+    stmt = select(Team).filter(Team.organization_id == org_id)
+    return await paginate(db, stmt, Team, page, response)
 
-@router.get("/{team_id}", response_model=TeamWithMembers)
-def get_team(org_id: int, team_id: int, db: Session = Depends(get_db)):
-    team = (
-        db.query(Team)
+@router.get("/{team_id}", response_model=TeamWithMembers, dependencies=[Depends(query_budget(2))])
+async def get_team(org_id: int, team_id: int, db: AsyncSession = Depends(get_db)):
+    team = await db.scalar(
+        select(Team)
+        .options(selectinload(Team.users))
         .filter(Team.id == team_id, Team.organization_id == org_id)
-        .first()
     )
     if not team:
         raise HTTPException(status_code=404, detail="Team not found")
     return team
 
 @router.patch("/{team_id}", response_model=TeamResponse)
-def update_team(
+async def update_team(
         org_id: int,
         team_id: int,
         payload: TeamUpdate,
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_db)
 ):
-    team = (
-        db.query(Team)
+    team = await db.scalar(
+        select(Team)
         .filter(Team.id == team_id, Team.organization_id == org_id)
-        .first()
     )
     if not team:
         raise HTTPException(status_code=404, detail="Team not found")
     for field, value in payload.dict(exclude_unset=True).items():
         setattr(team, field, value)
-    db.commit()
-    db.refresh(team)
+    await db.commit()
+    await db.refresh(team)
     return team
 
 @router.delete("/{team_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_team(org_id: int, team_id: int, db: Session = Depends(get_db)):
-    team = (
-        db.query(Team)
+async def delete_team(org_id: int, team_id: int, db: AsyncSession = Depends(get_db)):
+    team = await db.scalar(
+        select(Team)
         .filter(Team.id == team_id, Team.organization_id == org_id)
-        .first()
     )
     if not team:
         raise HTTPException(status_code=404, detail="Team not found")
-    db.delete(team)
-    db.commit()
+    await db.delete(team)
+    await db.commit()
@@ -1,8 +1,10 @@
 # File: api/routes/users.py
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from api.pagination import Page, paginate
 from db.session import get_db
 from schemas.user import UserCreate, UserResponse
 from models.user import User
@@ -10,31 +12,42 @@ from models.user import User
 router = APIRouter(prefix="/users", tags=["users"])
 
 @router.post("/", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-def create_user(user_in: UserCreate, db: Session = Depends(get_db)):
-    existing = db.query(User).filter(User.clerk_id == user_in.clerk_id).first()
+async def create_user(user_in: UserCreate, db: AsyncSession = Depends(get_db)):
+    existing = await db.scalar(select(User).filter(User.clerk_id == user_in.clerk_id))
     if existing:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="User already exists")
     new_user = User(**user_in.dict())
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
     return new_user
 
 @router.get("/", response_model=List[UserResponse])
-def list_users(db: Session = Depends(get_db)):
-    return db.query(User).all()
+async def list_users(
+        response: Response,
+        page: Page = Depends(),
+        organization_id: Optional[int] = Query(None),
+        is_active: Optional[bool] = Query(None),
+        db: AsyncSession = Depends(get_db),
+):
+    stmt = select(User)
+    if organization_id is not None:
+        stmt = stmt.filter(User.organization_id == organization_id)
+    if is_active is not None:
+        stmt = stmt.filter(User.is_active == is_active)
+    return await paginate(db, stmt, User, page, response)
 
 @router.get("/{user_id}", response_model=UserResponse)
-def get_user(user_id: int, db: Session = Depends(get_db)):
-    user = db.query(User).get(user_id)
+async def get_user(user_id: int, db: AsyncSession = Depends(get_db)):
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
     return user
 
 @router.delete("/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_user(user_id: int, db: Session = Depends(get_db)):
-    user = db.query(User).get(user_id)
+async def delete_user(user_id: int, db: AsyncSession = Depends(get_db)):
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
-    db.delete(user)
-    db.commit()
\ No newline at end of file
+    await db.delete(user)
+    await db.commit()
\ No newline at end of file
@@ -0,0 +1,58 @@
+"""
+Server-Timing header and a structured access log line for every HTTP
+request, from the database stats in db/instrumentation.py.
+
+    Server-Timing: db;dur=12.41;desc="queries: 4", app;dur=20.07
+
+A plain ASGI middleware rather than @app.middleware("http"): it passes
+WebSockets and streamed responses (/events) straight through, and the header
+is added to the response start message without buffering the body. The DB
+figures in the header cover everything up to that point, i.e. all of it for
+ordinary JSON endpoints.
+"""
+
+import logging
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from db.instrumentation import begin_request, end_request
+
+logger = logging.getLogger("api.access")
+
+
+class ServerTimingMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats, token = begin_request()
+        status_code = 500
+
+        async def send_with_timing(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                fields = stats.fields()
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "Server-Timing",
+                    f'db;dur={fields["db_ms"]};desc="queries: {fields["db_queries"]}", '
+                    f'app;dur={fields["duration_ms"]}',
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            end_request(token)
+            fields = stats.fields()
+            logger.info(
+                f'{scope["method"]} {scope["path"]} {status_code} '
+                f'{fields["duration_ms"]}ms db={fields["db_ms"]}ms queries={fields["db_queries"]}',
+                extra={"method": scope["method"], "path": scope["path"], "status": status_code, **fields},
+            )
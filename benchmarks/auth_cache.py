@@ -0,0 +1,107 @@
+"""
+Per-request cost of verify_clerk_token with and without the verified-token
+cache.
+
+Signs an RS256 token with a throwaway key, serves the matching JWKS from an
+in-process stub, and times the dependency the way /services calls it.
+
+    python -m benchmarks.auth_cache [--iterations 2000]
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jose import jwk, jwt
+from starlette.requests import Request
+
+import core.auth as auth
+from core.jwks import JWKSKeyManager
+from core.token_cache import VerifiedTokenCache
+
+KID = "bench-key"
+
+
+def make_signing_key():
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    private_pem = private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+    public_pem = private_key.public_key().public_bytes(
+        serialization.Encoding.PEM,
+        serialization.PublicFormat.SubjectPublicKeyInfo,
+    )
+    public_jwk = jwk.construct(public_pem, "RS256").to_dict()
+    public_jwk["kid"] = KID
+    return private_pem, public_jwk
+
+
+def make_request(token: str) -> Request:
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": "/services/",
+        "headers": [(b"authorization", f"Bearer {token}".encode())],
+    })
+
+
+async def time_verify(request: Request, iterations: int) -> float:
+    """Mean microseconds per verify_clerk_token call."""
+    await auth.verify_clerk_token(request)  # warm the JWKS cache
+    start = time.perf_counter()
+    for _ in range(iterations):
+        await auth.verify_clerk_token(request)
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+async def run(iterations: int) -> dict:
+    private_pem, public_jwk = make_signing_key()
+    token = jwt.encode(
+        {
+            "sub": "user_bench",
+            "user_id": 1,
+            "iss": auth.CLERK_ISSUER,
+            "aud": auth.CLERK_AUDIENCE,
+            "exp": int(time.time()) + 3600,
+        },
+        private_pem.decode(),
+        algorithm="RS256",
+        headers={"kid": KID},
+    )
+
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, json={"keys": [public_jwk]}))
+    auth.jwks = JWKSKeyManager("http://jwks.stub/", client=httpx.AsyncClient(transport=transport))
+    request = make_request(token)
+
+    auth.token_cache = VerifiedTokenCache(maxsize=0)
+    uncached_us = await time_verify(request, iterations)
+
+    auth.token_cache = VerifiedTokenCache()
+    cached_us = await time_verify(request, iterations)
+
+    await auth.jwks.aclose()
+    return {
+        "benchmark": "auth_cache",
+        "iterations": iterations,
+        "uncached_us_per_request": round(uncached_us, 2),
+        "cached_us_per_request": round(cached_us, 2),
+        "speedup": round(uncached_us / cached_us, 1),
+        "cache": auth.token_cache.stats(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args.iterations)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,439 @@
+"""
+Throughput and p50/p99 latency of the main API endpoints at 1k/10k/100k rows.
+
+Boots the real app from main.py (middleware included) in-process over ASGI,
+with get_db pointed at a scratch database that is dropped, recreated and
+seeded for each scale. The Redis client in core/redis_client.py is replaced
+by fakeredis before anything imports it. An outbox relay drains the
+scratch database into it, as the app's own relay would. Clerk is stubbed by
+a throwaway RS256 key whose JWKS is served from an in-process stub, so
+authenticated endpoints run the full token verification path. Query
+budgets (db/query_budget.py) are enforced, so a detail route that goes over
+its budget fails the run.
+
+    python -m benchmarks.endpoints [--database-url URL] [--scales 1000,10000,100000]
+                                   [--requests 200] [--concurrency 1]
+                                   [--output results.json] [--baseline previous.json]
+
+A scale of N seeds N status history rows, N incidents and N incident
+updates, N // 100 services (at least 10) with 30 days of rollups, as many
+teams, and 10 organizations. The default database is a temporary SQLite
+file; the stand-ins (aiosqlite, fakeredis) are in requirements-dev.txt. A
+--database-url must point at a scratch database: every table in it is
+dropped.
+
+The report is JSON keyed by scale and endpoint, so two runs diff cleanly.
+Each endpoint's database time and query count are taken from the
+Server-Timing header the app sends.
+With --baseline, each endpoint is also compared with the same entry in an
+earlier report, and the exit status is 1 if any p99 grew by more than
+--threshold.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import fakeredis
+import httpx
+from jose import jwt
+
+import core.redis_client
+
+# Swapped before core.outbox, core.status_cache and core.event_log bind it
+fake_redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+core.redis_client.redis_client = fake_redis
+
+from sqlalchemy import insert  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine  # noqa: E402
+
+import core.auth as auth  # noqa: E402
+from benchmarks.auth_cache import KID, make_signing_key  # noqa: E402
+from core.config import settings  # noqa: E402
+from core.jwks import JWKSKeyManager  # noqa: E402
+from core.outbox import OutboxRelay  # noqa: E402
+from db.base import Base  # noqa: E402
+from db.instrumentation import InstrumentedPool, instrument  # noqa: E402
+from db.session import _async_database_url, get_db  # noqa: E402
+from main import app  # noqa: E402
+from models import (  # noqa: E402
+    Incident,
+    IncidentUpdate,
+    Organization,
+    Service,
+    ServiceStatusDaily,
+    ServiceStatusUpdate,
+    Team,
+    TeamMember,
+    User,
+    incident_services,
+)
+
+DEFAULT_SCALES = (1_000, 10_000, 100_000)
+ORGANIZATIONS = 10
+ROLLUP_DAYS = 30
+CHUNK = 5_000
+WARMUP = 10
+
+SERVER_TIMING_DB = re.compile(r'db;dur=([0-9.]+);desc="queries: (\d+)"')
+
+STATUSES = ("operational", "degraded", "partial_outage", "major_outage")
+INCIDENT_STATUSES = ("investigating", "identified", "monitoring")
+
+
+def sizes(scale: int) -> dict:
+    return {
+        "organizations": ORGANIZATIONS,
+        "services": max(10, scale // 100),
+        "service_status_updates": scale,
+        "service_status_daily": max(10, scale // 100) * ROLLUP_DAYS,
+        "teams": max(10, scale // 100),
+        "incidents": scale,
+        "incident_updates": scale,
+    }
+
+
+def seed_rows(rows: dict, now: datetime):
+    """(table, rows) in insertion order; deterministic for a given scale."""
+    services, organizations = rows["services"], rows["organizations"]
+    span = timedelta(days=ROLLUP_DAYS).total_seconds()
+    today = now.date()
+
+    def ago(i: int, total: int) -> datetime:
+        return now - timedelta(seconds=span * (total - i) / total)
+
+    yield User.__table__, [{"id": 1, "clerk_id": "user_bench", "email": "bench@example.com"}]
+    yield Organization.__table__, [
+        {"id": i, "name": f"Org {i}", "slug": f"org-{i}", "is_active": True, "created_at": now, "updated_at": now}
+        for i in range(1, organizations + 1)
+    ]
+    yield Team.__table__, [
+        {
+            "id": i,
+            "name": f"Team {i}",
+            "slug": f"team-{i}",
+            "organization_id": 1 + i % organizations,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for i in range(1, rows["teams"] + 1)
+    ]
+    yield TeamMember.__table__, [
+        {"team_id": i, "user_id": 1, "role": "member"} for i in range(1, rows["teams"] + 1)
+    ]
+    yield Service.__table__, [
+        {
+            "id": i,
+            "name": f"Service {i}",
+            "slug": f"service-{i}",
+            "organization_id": 1 + i % organizations,
+            "current_status": "operational",
+            "created_at": ago(i, services),
+        }
+        for i in range(1, services + 1)
+    ]
+    total = rows["service_status_updates"]
+    yield ServiceStatusUpdate.__table__, [
+        {
+            "service_id": 1 + i % services,
+            "status": STATUSES[0] if i % 10 else STATUSES[(i // 10) % 4],
+            "created_by": 1,
+            "created_at": ago(i, total),
+            "updated_at": ago(i, total),
+        }
+        for i in range(total)
+    ]
+    yield ServiceStatusDaily.__table__, [
+        {"service_id": s, "day": today - timedelta(days=d), "operational_seconds": 86400}
+        for s in range(1, services + 1)
+        for d in range(1, ROLLUP_DAYS + 1)
+    ]
+    total = rows["incidents"]
+    yield Incident.__table__, [
+        {
+            "id": i,
+            "title": f"Incident {i}",
+            "type": "incident",
+            # 2% still open, like a real backlog
+            "status": INCIDENT_STATUSES[i % 3] if i % 50 == 0 else "resolved",
+            "impact": "minor",
+            "organization_id": 1 + i % organizations,
+            "created_by": 1,
+            "created_at": ago(i, total + 1),
+        }
+        for i in range(1, total + 1)
+    ]
+    yield incident_services, [
+        {"incident_id": i, "service_id": 1 + (i * 13) % services} for i in range(1, total + 1)
+    ]
+    yield IncidentUpdate.__table__, [
+        {
+            "incident_id": 1 + i % total,
+            "message": f"Update {i}",
+            "status": "investigating",
+            "created_by": 1,
+            "created_at": ago(i, rows["incident_updates"]),
+        }
+        for i in range(rows["incident_updates"])
+    ]
+
+
+async def seed(engine, rows: dict):
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+        for table, values in seed_rows(rows, datetime.utcnow()):
+            for start in range(0, len(values), CHUNK):
+                await conn.execute(insert(table), values[start:start + CHUNK])
+        if conn.dialect.name == "postgresql":
+            # Explicit ids leave the sequences behind
+            for table in ("users", "organizations", "teams", "services", "incidents"):
+                await conn.exec_driver_sql(
+                    f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT max(id) FROM {table}))"
+                )
+    if engine.dialect.name == "postgresql":
+        async with engine.connect() as conn:
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            await conn.exec_driver_sql("VACUUM ANALYZE")
+
+
+def endpoints(rows: dict) -> list[tuple[str, object]]:
+    """(name, request builder) for each endpoint; builders take a random.Random."""
+    services, incidents, teams = rows["services"], rows["incidents"], rows["teams"]
+
+    def get_team(rng):
+        team_id = rng.randint(1, teams)
+        return "GET", f"/organizations/{1 + team_id % ORGANIZATIONS}/teams/{team_id}", None
+
+    def status_update(rng):
+        return "POST", f"/services/{rng.randint(1, services)}/status", {"current_status": rng.choice(STATUSES)}
+
+    def create_incident(rng):
+        return "POST", "/incidents/", {
+            "title": "Elevated error rates",
+            "impact": "major",
+            "organization_id": rng.randint(1, ORGANIZATIONS),
+            "service_ids": [rng.randint(1, services)],
+        }
+
+    return [
+        ("public_status", lambda rng: ("GET", "/public/status", None)),
+        ("public_services", lambda rng: ("GET", "/public/services", None)),
+        ("public_incidents", lambda rng: ("GET", "/public/incidents", None)),
+        ("public_uptime", lambda rng: ("GET", f"/public/uptime?organization_id={rng.randint(1, ORGANIZATIONS)}", None)),
+        ("list_services", lambda rng: ("GET", f"/services/?organization_id={rng.randint(1, ORGANIZATIONS)}", None)),
+        ("list_incidents", lambda rng: ("GET", f"/incidents/?organization_id={rng.randint(1, ORGANIZATIONS)}", None)),
+        ("list_open_incidents", lambda rng: ("GET", "/incidents/?status=investigating", None)),
+        ("get_incident", lambda rng: ("GET", f"/incidents/{rng.randint(1, incidents)}", None)),
+        ("get_organization", lambda rng: ("GET", f"/organizations/{rng.randint(1, ORGANIZATIONS)}", None)),
+        ("get_team", get_team),
+        ("status_history", lambda rng: ("GET", f"/services/{rng.randint(1, services)}/status/history", None)),
+        # Writes last, so the reads above see the seeded data only
+        ("service_status_update", status_update),
+        ("create_incident", create_incident),
+    ]
+
+
+def percentile(ordered: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    return ordered[min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))]
+
+
+async def measure(client: httpx.AsyncClient, build, requests: int, concurrency: int, seed: int) -> dict:
+    rng = random.Random(seed)
+    planned = [build(rng) for _ in range(WARMUP + requests)]
+    for method, url, body in planned[:WARMUP]:
+        (await client.request(method, url, json=body)).raise_for_status()
+
+    queue = iter(planned[WARMUP:])
+    latencies, db_times, db_queries = [], [], []
+
+    async def worker():
+        for method, url, body in queue:
+            t0 = time.perf_counter()
+            response = await client.request(method, url, json=body)
+            latencies.append(time.perf_counter() - t0)
+            response.raise_for_status()
+            timing = SERVER_TIMING_DB.search(response.headers.get("server-timing", ""))
+            if timing:
+                db_times.append(float(timing.group(1)))
+                db_queries.append(int(timing.group(2)))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    result = {
+        "requests": requests,
+        "requests_per_second": round(requests / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "max_ms": round(latencies[-1] * 1000, 3),
+    }
+    if db_times:
+        result["db_p50_ms"] = percentile(sorted(db_times), 50)
+        result["db_queries_max"] = max(db_queries)
+    return result
+
+
+def signed_token(private_pem: bytes) -> str:
+    return jwt.encode(
+        {
+            "sub": "user_bench",
+            "user_id": 1,
+            "iss": auth.CLERK_ISSUER,
+            "aud": auth.CLERK_AUDIENCE,
+            "exp": int(time.time()) + 3600,
+        },
+        private_pem.decode(),
+        algorithm="RS256",
+        headers={"kid": KID},
+    )
+
+
+async def run_scale(database_url: str, scale: int, requests: int, concurrency: int, headers: dict) -> dict:
+    db_url, connect_args = _async_database_url(database_url)
+    # Instrumented like the app's engine, so Server-Timing and the pool
+    # metrics report the scratch database's work
+    engine = create_async_engine(db_url, connect_args=connect_args, poolclass=InstrumentedPool)
+    instrument(engine.sync_engine)
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+    rows = sizes(scale)
+
+    start = time.perf_counter()
+    await seed(engine, rows)
+    seed_seconds = time.perf_counter() - start
+    await fake_redis.flushall()
+
+    async def override_db():
+        async with session_factory() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = override_db
+    relay = OutboxRelay(
+        session_factory,
+        fake_redis,
+        batch_size=settings.OUTBOX_BATCH_SIZE,
+        poll_interval=settings.OUTBOX_POLL_INTERVAL,
+    )
+    relay.start()
+
+    results = {}
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers=headers) as client:
+            for n, (name, build) in enumerate(endpoints(rows)):
+                results[name] = await measure(client, build, requests, concurrency, seed=scale + n)
+    finally:
+        await relay.aclose()
+        app.dependency_overrides.pop(get_db, None)
+        await engine.dispose()
+
+    return {"rows": rows, "seed_seconds": round(seed_seconds, 2), "endpoints": results}
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(report: dict, baseline: dict, threshold: float) -> tuple[dict, list[str]]:
+    """Ratios against the baseline's matching entries, and the p99 regressions."""
+    ratios, regressions = {}, []
+    for scale, current in report["scales"].items():
+        previous = baseline.get("scales", {}).get(scale, {}).get("endpoints", {})
+        for name, entry in current["endpoints"].items():
+            before = previous.get(name)
+            if not before:
+                continue
+            change = {
+                key: round(entry[key] / before[key], 3)
+                for key in ("requests_per_second", "p50_ms", "p99_ms")
+                if before.get(key)
+            }
+            ratios.setdefault(scale, {})[name] = change
+            if change.get("p99_ms", 0) > threshold:
+                regressions.append(f"{name} at {scale} rows: p99 x{change['p99_ms']}")
+    return ratios, regressions
+
+
+async def run(database_url: str, scales: list[int], requests: int, concurrency: int) -> dict:
+    private_pem, public_jwk = make_signing_key()
+    stub = httpx.MockTransport(lambda request: httpx.Response(200, json={"keys": [public_jwk]}))
+    auth.jwks = JWKSKeyManager("http://jwks.stub/", client=httpx.AsyncClient(transport=stub))
+    headers = {"Authorization": f"Bearer {signed_token(private_pem)}"}
+    # An over-budget detail route raises instead of only being logged
+    settings.QUERY_BUDGET_ENFORCE = True
+
+    report = {
+        "benchmark": "endpoints",
+        "commit": git_commit(),
+        "database": _async_database_url(database_url)[0].get_backend_name(),
+        "requests": requests,
+        "concurrency": concurrency,
+        "scales": {},
+    }
+    try:
+        for scale in scales:
+            report["scales"][str(scale)] = await run_scale(database_url, scale, requests, concurrency, headers)
+    finally:
+        await auth.jwks.aclose()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--database-url", help="scratch database; all tables are dropped")
+    parser.add_argument("--scales", default=",".join(map(str, DEFAULT_SCALES)))
+    parser.add_argument("--requests", type=int, default=200, help="timed requests per endpoint and scale")
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--output", help="write the report here instead of stdout")
+    parser.add_argument("--baseline", help="earlier report to compare with")
+    parser.add_argument("--threshold", type=float, default=1.25, help="p99 ratio counted as a regression")
+    args = parser.parse_args()
+    # One line per client request otherwise; the app's own logging is left as is
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    database_url = args.database_url
+    scratch = None
+    if database_url is None:
+        scratch = tempfile.NamedTemporaryFile(suffix=".sqlite", delete=False)
+        database_url = f"sqlite+aiosqlite:///{scratch.name}"
+    try:
+        scales = [int(scale) for scale in args.scales.split(",")]
+        report = asyncio.run(run(database_url, scales, args.requests, args.concurrency))
+    finally:
+        if scratch is not None:
+            os.unlink(scratch.name)
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            report["vs_baseline"], regressions = compare(report, json.load(f), args.threshold)
+        report["regressions"] = regressions
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+"""
+EXPLAIN check of the composite and partial indexes on a seeded PostgreSQL.
+
+Drops and recreates every table in the given database (use a scratch one),
+seeds it deterministically with generate_series, runs VACUUM ANALYZE, then
+explains the query shapes the API issues with EXPLAIN (ANALYZE, BUFFERS).
+A shape passes when its plan reads the expected index with an index, index-
+only or bitmap index scan. With --compare each query is explained again with
+its index dropped, inside a transaction that is rolled back, to show the
+before/after cost. The exit status is 1 if any shape misses its index.
+
+    python -m benchmarks.explain_indexes --database-url postgresql://localhost/status_bench [--scale 1] [--compare]
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+
+from sqlalchemy import func, literal_column, select, text, tuple_
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from db.base import Base
+from db.session import _async_database_url
+from models import Incident, IncidentUpdate, Service, ServiceStatusDaily, ServiceStatusUpdate, Team, incident_services
+
+INDEX_SCANS = ("Index Scan", "Index Only Scan", "Bitmap Index Scan")
+
+# Rows per unit of --scale
+SIZES = {
+    "organizations": 50,
+    "services": 2000,
+    "teams": 500,
+    "service_status_updates": 500_000,
+    "incidents": 100_000,
+    "incident_updates": 300_000,
+}
+
+# Deterministic: every value is a function of the generate_series counter
+SEED = [
+    """INSERT INTO organizations (name, slug, is_active, created_at)
+       SELECT 'org-' || g, 'org-' || g, true, now() - g * interval '1 day'
+       FROM generate_series(1, :organizations) g""",
+    """INSERT INTO services (name, slug, organization_id, current_status, created_at)
+       SELECT 'svc-' || g, 'svc-' || g, 1 + g % :organizations, 'operational', now() - g * interval '1 hour'
+       FROM generate_series(1, :services) g""",
+    """INSERT INTO teams (name, slug, organization_id, created_at)
+       SELECT 'team-' || g, 'team-' || g, 1 + g % :organizations, now() - g * interval '1 hour'
+       FROM generate_series(1, :teams) g""",
+    """INSERT INTO service_status_updates (service_id, status, created_at, updated_at)
+       SELECT 1 + g % :services,
+              (ARRAY['operational', 'degraded', 'partial_outage', 'major_outage'])[1 + (g * 7) % 4],
+              now() - g * interval '10 seconds', now() - g * interval '10 seconds'
+       FROM generate_series(1, :service_status_updates) g""",
+    """INSERT INTO incidents (title, type, status, impact, organization_id, created_at)
+       SELECT 'Incident ' || g, 'incident',
+              CASE WHEN g % 50 = 0 THEN 'investigating' ELSE 'resolved' END,
+              'minor', 1 + g % :organizations, now() - g * interval '1 minute'
+       FROM generate_series(1, :incidents) g""",
+    """INSERT INTO incident_updates (incident_id, message, status, created_at)
+       SELECT 1 + g % :incidents, 'Update ' || g, 'investigating', now() - g * interval '20 seconds'
+       FROM generate_series(1, :incident_updates) g""",
+    """INSERT INTO incident_services (incident_id, service_id)
+       SELECT g, 1 + (g * 13) % :services FROM generate_series(1, :incidents) g""",
+    """INSERT INTO service_status_daily
+           (service_id, day, operational_seconds, degraded_seconds, partial_outage_seconds, major_outage_seconds)
+       SELECT s, current_date - d, 86400, 0, 0, 0
+       FROM generate_series(1, :services) s, generate_series(1, 90) d""",
+]
+
+
+def query_shapes() -> list[tuple[str, str, object]]:
+    """(name, index expected in the plan, statement) for each hot query."""
+    history = ServiceStatusUpdate
+    newest = (history.created_at.desc(), history.id.desc())
+    month_ago = func.now() - literal_column("interval '30 days'")
+    return [
+        (
+            "service status history, first page",
+            "ix_service_status_updates_service_created",
+            select(history).filter(history.service_id == 42).order_by(*newest).limit(51),
+        ),
+        (
+            "service status history, page after a cursor",
+            "ix_service_status_updates_service_created",
+            select(history)
+            .filter(history.service_id == 42, tuple_(history.created_at, history.id) < tuple_(month_ago, 0))
+            .order_by(*newest).limit(51),
+        ),
+        (
+            "previous status in record_status()",
+            "ix_service_status_updates_service_created",
+            select(history.created_at, history.status)
+            .filter(history.service_id == 42, history.created_at <= func.now())
+            .order_by(*newest).limit(1),
+        ),
+        (
+            "latest transition per service (uptime)",
+            "ix_service_status_updates_service_created",
+            select(history.service_id, func.max(history.created_at))
+            .filter(history.service_id.in_(list(range(1, 101))), history.created_at <= func.now())
+            .group_by(history.service_id),
+        ),
+        (
+            "daily rollups in the uptime window",
+            "service_status_daily_pkey",
+            select(ServiceStatusDaily).filter(
+                ServiceStatusDaily.service_id.in_(list(range(1, 101))),
+                ServiceStatusDaily.day >= func.current_date() - 89,
+            ),
+        ),
+        (
+            "incident updates, first page",
+            "ix_incident_updates_incident_created",
+            select(IncidentUpdate).filter(IncidentUpdate.incident_id == 4200)
+            .order_by(IncidentUpdate.created_at.desc(), IncidentUpdate.id.desc()).limit(51),
+        ),
+        (
+            "open incidents, newest first",
+            "ix_incidents_open_created",
+            select(Incident).filter(Incident.status != "resolved")
+            .order_by(Incident.created_at.desc(), Incident.id.desc()).limit(51),
+        ),
+        (
+            "incidents of an organization",
+            "ix_incidents_org_created",
+            select(Incident).filter(Incident.organization_id == 7)
+            .order_by(Incident.created_at.desc(), Incident.id.desc()).limit(51),
+        ),
+        (
+            "services of an organization",
+            "ix_services_org_created",
+            select(Service).filter(Service.organization_id == 7)
+            .order_by(Service.created_at.desc(), Service.id.desc()).limit(51),
+        ),
+        (
+            "teams of an organization",
+            "ix_teams_org_created",
+            select(Team).filter(Team.organization_id == 7)
+            .order_by(Team.created_at.desc(), Team.id.desc()).limit(51),
+        ),
+        (
+            "incidents affecting a service",
+            "ix_incident_services_service_incident",
+            select(incident_services.c.incident_id).filter(incident_services.c.service_id == 42),
+        ),
+    ]
+
+
+def _scans(plan: dict):
+    """Every (node type, index name) in a plan tree."""
+    yield plan["Node Type"], plan.get("Index Name")
+    for child in plan.get("Plans", ()):
+        yield from _scans(child)
+
+
+async def explain(conn, stmt) -> dict:
+    sql = str(stmt.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+    result = await conn.exec_driver_sql(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}")
+    raw = result.scalar()
+    return (json.loads(raw) if isinstance(raw, str) else raw)[0]
+
+
+def summarize(report: dict, expected: str | None = None) -> dict:
+    plan = report["Plan"]
+    scans = list(_scans(plan))
+    used = next(((node, index) for node, index in scans if expected and index == expected), None)
+    leaf = next(node for node, _ in reversed(scans) if "Scan" in node)
+    return {
+        "ok": used is not None and used[0] in INDEX_SCANS,
+        "scan": used[0] if used else leaf,
+        "nodes": [node if index is None else f"{node} using {index}" for node, index in scans],
+        "execution_ms": round(report["Execution Time"], 3),
+        "shared_buffers": plan.get("Shared Hit Blocks", 0) + plan.get("Shared Read Blocks", 0),
+    }
+
+
+async def run(database_url: str, scale: float, compare: bool) -> dict:
+    db_url, connect_args = _async_database_url(database_url)
+    if db_url.get_backend_name() != "postgresql":
+        raise SystemExit("explain_indexes needs a PostgreSQL database")
+    engine = create_async_engine(db_url, connect_args=connect_args)
+    sizes = {table: max(1, int(rows * scale)) for table, rows in SIZES.items()}
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+        for statement in SEED:
+            await conn.execute(text(statement), sizes)
+    # Index-only scans need the visibility map VACUUM builds
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.exec_driver_sql("VACUUM ANALYZE")
+
+    results = []
+    async with engine.connect() as conn:
+        for name, index, stmt in query_shapes():
+            entry = {"query": name, "expected_index": index, **summarize(await explain(conn, stmt), index)}
+            if compare and index.startswith("ix_"):
+                # DDL is transactional in PostgreSQL; the rollback restores the index
+                await conn.exec_driver_sql(f"DROP INDEX {index}")
+                without = summarize(await explain(conn, stmt))
+                await conn.rollback()
+                entry["without_index"] = {key: without[key] for key in ("scan", "execution_ms", "shared_buffers")}
+            results.append(entry)
+
+    await engine.dispose()
+    return {
+        "benchmark": "explain_indexes",
+        "scale": scale,
+        "rows": sizes,
+        "all_ok": all(entry["ok"] for entry in results),
+        "queries": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--database-url", required=True, help="scratch PostgreSQL database; all tables are dropped")
+    parser.add_argument("--scale", type=float, default=1.0)
+    parser.add_argument("--compare", action="store_true", help="also explain each query without its index")
+    args = parser.parse_args()
+    report = asyncio.run(run(args.database_url, args.scale, args.compare))
+    print(json.dumps(report, indent=2))
+    sys.exit(0 if report["all_ok"] else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,34 +1,41 @@
 from fastapi import Request, HTTPException, status, Depends
 from jose import jwt, JWTError
-import httpx
+import logging
 import os
 from dotenv import load_dotenv
 
+from core.config import settings
+from core.jwks import JWKSError, JWKSKeyManager, UnknownKeyError
+from core.token_cache import VerifiedTokenCache
+
 load_dotenv(dotenv_path=".env.local", override=True)
 
+logger = logging.getLogger(__name__)
+
 CLERK_JWKS_URL = os.getenv("CLERK_JWKS_URL", "https://loving-gopher-42.clerk.accounts.dev/.well-known/jwks.json")
 CLERK_ISSUER = os.getenv("CLERK_ISSUER", "https://loving-gopher-42.clerk.accounts.dev")
 CLERK_AUDIENCE = os.getenv("CLERK_AUDIENCE", "authenticated")
 
-# Cache for keys
-_jwk_cache = {}
-
-async def get_public_key(kid: str):
-    if kid in _jwk_cache:
-        return _jwk_cache[kid]
-
-    async with httpx.AsyncClient() as client:
-        resp = await client.get(CLERK_JWKS_URL)
-        if resp.status_code != 200:
-            raise HTTPException(status_code=500, detail="Failed to fetch JWKS from Clerk")
-        keys = resp.json()["keys"]
+# Shared key manager; started/stopped with the app in main.py
+jwks = JWKSKeyManager(
+    CLERK_JWKS_URL,
+    ttl=settings.JWKS_TTL,
+    max_stale=settings.JWKS_MAX_STALE,
+    min_refresh_interval=settings.JWKS_MIN_REFRESH_INTERVAL,
+    negative_ttl=settings.JWKS_NEGATIVE_TTL,
+    max_unknown=settings.JWKS_NEGATIVE_CACHE_SIZE,
+)
 
-    for key in keys:
-        if key["kid"] == kid:
-            _jwk_cache[kid] = key
-            return key
+# Claims of tokens we have already verified, until they expire
+token_cache = VerifiedTokenCache(maxsize=settings.TOKEN_CACHE_SIZE)
 
-    raise HTTPException(status_code=401, detail="Invalid token key ID")
+async def get_public_key(kid: str):
+    try:
+        return await jwks.get_key(kid)
+    except JWKSError:
+        raise HTTPException(status_code=500, detail="Failed to fetch JWKS from Clerk")
+    except UnknownKeyError:
+        raise HTTPException(status_code=401, detail="Invalid token key ID")
 
 async def verify_clerk_token(request: Request):
     auth_header = request.headers.get("Authorization")
@@ -36,6 +43,10 @@ async def verify_clerk_token(request: Request):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing or invalid token")
 
     token = auth_header.split(" ")[1]
+    payload = token_cache.get(token)
+    if payload is not None:
+        return payload
+
     try:
         unverified_header = jwt.get_unverified_header(token)
         key = await get_public_key(unverified_header["kid"])
@@ -46,7 +57,8 @@ async def verify_clerk_token(request: Request):
             audience=CLERK_AUDIENCE,
             issuer=CLERK_ISSUER,
         )
-        print("PAYLOAD: ", payload)
+        logger.debug(f"PAYLOAD: {payload}")
+        token_cache.put(token, payload)
         return payload  # Contains user_id, org_id, etc.
     except JWTError as e:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=f"Token validation failed: {str(e)}")
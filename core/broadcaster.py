@@ -0,0 +1,444 @@
+"""
+WebSocket fanout.
+
+Every connected socket gets its own bounded send queue and writer task.
+Broadcasting an event is therefore a non-blocking enqueue per client, and a
+slow client can only ever hold up itself. Clients are handed the same
+pre-encoded Frame, so there is no per-client serialization either.
+
+Clients may narrow what they receive to a set of organizations, services
+and/or event types. Scoped clients are kept in a topic -> connections
+index, so an event only touches the clients that asked for it.
+
+Clients on the delta protocol get Frame.delta instead of the full frame
+(see core/deltas.py). They cannot tolerate a gap, so they are never on the
+losing end of "drop_oldest": a delta client that falls that far behind is
+evicted and resumes from the event log instead.
+"""
+
+import asyncio
+import itertools
+import logging
+from collections import OrderedDict
+
+from fastapi import WebSocket
+
+from core import metrics
+from core.config import settings
+from core.deltas import DeltaTracker
+from core.events import Frame, batch_binary, batch_text
+from core.sse import SSEStream
+
+logger = logging.getLogger(__name__)
+
+SLOW_CONSUMER_POLICIES = ("drop_oldest", "coalesce", "disconnect")
+
+
+def _parse_ids(values) -> set[int]:
+    """Accept repeated and/or comma-separated ids: ["1,2", "3"] -> {1, 2, 3}."""
+    ids = set()
+    for value in values:
+        for part in str(value).split(","):
+            if part.strip():
+                ids.add(int(part))
+    return ids
+
+
+def _parse_names(values) -> set[str]:
+    return {part.strip() for value in values for part in str(value).split(",") if part.strip()}
+
+
+class Subscription:
+    """
+    What a client wants to receive. Empty sets mean "everything", so a
+    client with no filters at all gets every event.
+    """
+
+    __slots__ = ("organization_ids", "service_ids", "event_types")
+
+    def __init__(self, organization_ids=(), service_ids=(), event_types=()):
+        self.organization_ids: set[int] = set(organization_ids)
+        self.service_ids: set[int] = set(service_ids)
+        self.event_types: set[str] = set(event_types)
+
+    @classmethod
+    def from_query(cls, params) -> "Subscription":
+        """Build from ?organization_id=1,2&service_id=3&event_type=incident"""
+        return cls(
+            organization_ids=_parse_ids(params.getlist("organization_id")),
+            service_ids=_parse_ids(params.getlist("service_id")),
+            event_types=_parse_names(params.getlist("event_type")),
+        )
+
+    def updated(self, message: dict) -> "Subscription":
+        """
+        Apply a client "subscribe"/"unsubscribe" message, e.g.
+        {"action": "subscribe", "organization_ids": [1], "event_types": ["incident"]}
+        """
+        action = message.get("action")
+        if action not in ("subscribe", "unsubscribe"):
+            raise ValueError(f"Unknown action: {action!r}")
+        org_ids = _parse_ids(message.get("organization_ids") or ())
+        service_ids = _parse_ids(message.get("service_ids") or ())
+        event_types = _parse_names(message.get("event_types") or ())
+        if action == "subscribe":
+            return Subscription(
+                self.organization_ids | org_ids,
+                self.service_ids | service_ids,
+                self.event_types | event_types,
+            )
+        return Subscription(
+            self.organization_ids - org_ids,
+            self.service_ids - service_ids,
+            self.event_types - event_types,
+        )
+
+    @property
+    def topics(self) -> list[tuple]:
+        return (
+            [("organization", org_id) for org_id in self.organization_ids]
+            + [("service", service_id) for service_id in self.service_ids]
+        )
+
+    @property
+    def is_scoped(self) -> bool:
+        return bool(self.organization_ids or self.service_ids)
+
+    def accepts_type(self, event_type: str) -> bool:
+        return not self.event_types or event_type in self.event_types
+
+    def matches(self, frame: Frame) -> bool:
+        """Direct check, for frames that are not routed through the index."""
+        if not self.accepts_type(frame.event["event_type"]):
+            return False
+        if not self.is_scoped:
+            return True
+        wanted = set(self.topics)
+        return any(topic in wanted for topic in frame.topics)
+
+    def to_dict(self) -> dict:
+        return {
+            "organization_ids": sorted(self.organization_ids),
+            "service_ids": sorted(self.service_ids),
+            "event_types": sorted(self.event_types),
+        }
+
+
+class Connection:
+    """A single WebSocket client with its own send queue and writer task."""
+
+    def __init__(
+            self,
+            ws: WebSocket | SSEStream,
+            max_queue: int,
+            policy: str,
+            send_timeout: float,
+            frame_format: str = "json",
+            deltas: bool = False,
+            batch: bool = False,
+    ):
+        self.ws = ws
+        self.frame_format = frame_format
+        self.deltas = deltas
+        self.batch = batch
+        self.subscription = Subscription()
+        self.max_queue = max_queue
+        self.policy = policy
+        self.send_timeout = send_timeout
+        self.dropped = 0
+        self.closed = False
+
+        # Keyed so the "coalesce" policy can replace a queued event in place.
+        self._queue: OrderedDict = OrderedDict()
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._writer: asyncio.Task | None = None
+        # While a resuming client is being replayed, live frames wait here
+        self._held: list[Frame] | None = None
+
+    @property
+    def depth(self) -> int:
+        return len(self._queue) + len(self._held or ())
+
+    @property
+    def transport(self) -> str:
+        return "sse" if self.frame_format == "sse" else "websocket"
+
+    def hold(self):
+        """Buffer live frames until resume() is called."""
+        self._held = []
+
+    def resume(self, replayed: list[Frame]):
+        """
+        Queue the replayed frames, then the live frames held meanwhile,
+        skipping any live frame the replay already covered.
+        """
+        held, self._held = self._held or [], None
+        last_id = replayed[-1].event_id if replayed else None
+        for frame in replayed:
+            self.enqueue(frame)
+        for frame in held:
+            if frame.is_after(last_id):
+                self.enqueue(frame)
+
+    def enqueue(self, frame: Frame) -> bool:
+        """
+        Queue a frame for this client without blocking.
+        Returns False when the client should be evicted.
+        """
+        if self.closed:
+            return False
+        if self._held is not None:
+            if len(self._held) >= self.max_queue:
+                return False
+            self._held.append(frame)
+            return True
+
+        key = frame.key if self.policy == "coalesce" else None
+        if key is not None and key in self._queue:
+            # A delta only applies on top of the one it replaces; the full
+            # frame does not depend on it. Re-queue it at the end so frames
+            # still go out in event_id order.
+            del self._queue[key]
+            self._queue[key] = frame
+            return True
+        if self.deltas:
+            frame = frame.delta
+
+        if len(self._queue) >= self.max_queue:
+            if self.policy == "disconnect" or self.deltas:
+                return False
+            self._queue.popitem(last=False)
+            self.dropped += 1
+
+        self._queue[key if key is not None else next(self._seq)] = frame
+        self._wakeup.set()
+        return True
+
+    async def _run_writer(self, on_error):
+        try:
+            while not self.closed:
+                await self._wakeup.wait()
+                self._wakeup.clear()
+                while self._queue and not self.closed:
+                    if self.batch and len(self._queue) > 1:
+                        frames = list(self._queue.values())
+                        self._queue.clear()
+                        await asyncio.wait_for(self._send_batch(frames), self.send_timeout)
+                        continue
+                    _, frame = self._queue.popitem(last=False)
+                    await asyncio.wait_for(self._send(frame), self.send_timeout)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.info(f"WebSocket writer for {self.ws.client} stopped: {e}")
+            on_error(self)
+
+    def _send(self, frame: Frame):
+        if self.frame_format == "msgpack":
+            return self.ws.send_bytes(frame.binary)
+        if self.frame_format == "sse":
+            return self.ws.send_text(frame.sse)
+        return self.ws.send_text(frame.text)
+
+    def _send_batch(self, frames: list[Frame]):
+        if self.frame_format == "msgpack":
+            return self.ws.send_bytes(batch_binary(frames))
+        if self.frame_format == "sse":
+            # An event stream batches natively: one write, many events
+            return self.ws.send_text("".join(frame.sse for frame in frames))
+        return self.ws.send_text(batch_text(frames))
+
+    def start(self, on_error):
+        self._writer = asyncio.create_task(self._run_writer(on_error))
+
+    async def close(self, code: int = 1000):
+        if self.closed:
+            return
+        self.closed = True
+        self._queue.clear()
+        if self._writer and self._writer is not asyncio.current_task():
+            self._writer.cancel()
+        try:
+            await self.ws.close(code=code)
+        except Exception:
+            pass
+
+
+class Broadcaster:
+    """Fans events out to every registered Connection."""
+
+    def __init__(
+            self,
+            max_queue: int = 100,
+            policy: str = "coalesce",
+            send_timeout: float = 10.0,
+            batch: bool = False,
+    ):
+        if policy not in SLOW_CONSUMER_POLICIES:
+            raise ValueError(f"Unknown slow-consumer policy: {policy!r}")
+        self.max_queue = max_queue
+        self.policy = policy
+        self.send_timeout = send_timeout
+        # Send everything a client has queued as one "batch" frame
+        self.batch = batch
+        self.evicted = 0
+        self._dropped_closed = 0
+        self._connections: set[Connection] = set()
+        # Clients without organization/service filters get every event...
+        self._unscoped: set[Connection] = set()
+        # ...the rest are indexed by the topics they asked for.
+        self._index: dict[tuple, set[Connection]] = {}
+        # Which organizations' channels this worker needs to hear.
+        self._org_refs: dict[int, int] = {}
+        self._all_org_refs = 0
+        self._interest_listeners = []
+        self.tracker = DeltaTracker()
+
+    def connect(
+            self,
+            ws: WebSocket | SSEStream,
+            frame_format: str = "json",
+            subscription: Subscription | None = None,
+            hold: bool = False,
+            deltas: bool = False,
+    ) -> Connection:
+        conn = Connection(
+            ws, self.max_queue, self.policy, self.send_timeout, frame_format, deltas, self.batch,
+        )
+        if hold:
+            conn.hold()
+        self._connections.add(conn)
+        self._index_add(conn, subscription or Subscription())
+        conn.start(lambda conn: self._evict(conn, "send_failed"))
+        metrics.ws_connections.labels(conn.transport).inc()
+        return conn
+
+    async def disconnect(self, conn: Connection):
+        if conn in self._connections:
+            self._remove(conn)
+        await conn.close()
+
+    def subscribe(self, conn: Connection, subscription: Subscription):
+        """Replace a client's subscription and re-index it."""
+        if conn not in self._connections:
+            return
+        self._index_remove(conn)
+        self._index_add(conn, subscription)
+
+    def publish(self, frame: Frame) -> None:
+        """Enqueue a frame for every interested client; never awaits a socket."""
+        with metrics.fanout_duration.time():
+            self.tracker.observe(frame)
+            event_type = frame.event["event_type"]
+            for conn in self._targets(frame):
+                if not conn.subscription.accepts_type(event_type):
+                    continue
+                if not conn.enqueue(frame):
+                    self._evict(conn, "slow_consumer")
+
+    def _targets(self, frame: Frame) -> list[Connection]:
+        targets = list(self._unscoped)
+        topics = frame.topics
+        if len(topics) == 1:
+            targets.extend(self._index.get(topics[0], ()))
+        elif topics:
+            scoped: set[Connection] = set()
+            for topic in topics:
+                scoped.update(self._index.get(topic, ()))
+            targets.extend(scoped)
+        return targets
+
+    def interest(self) -> frozenset | None:
+        """
+        Organizations this worker's clients care about, or None while any
+        client needs events from every organization (including any client
+        subscribed to services).
+        """
+        if self._all_org_refs:
+            return None
+        return frozenset(self._org_refs)
+
+    def on_interest_change(self, callback):
+        self._interest_listeners.append(callback)
+
+    def _track_interest(self, subscription: Subscription, delta: int):
+        before = self.interest()
+        # A service's events are published on its organization's channel (or
+        # the unscoped one), which a service subscription cannot name
+        if not subscription.organization_ids or subscription.service_ids:
+            self._all_org_refs += delta
+        for org_id in subscription.organization_ids:
+            refs = self._org_refs.get(org_id, 0) + delta
+            if refs:
+                self._org_refs[org_id] = refs
+            else:
+                self._org_refs.pop(org_id, None)
+        after = self.interest()
+        if after != before:
+            # Only organizations that lost interest can miss events
+            if after is not None and (before is None or before - after):
+                self.tracker.retain(after)
+            for callback in self._interest_listeners:
+                callback()
+
+    def _index_add(self, conn: Connection, subscription: Subscription):
+        conn.subscription = subscription
+        self._track_interest(subscription, 1)
+        if not subscription.is_scoped:
+            self._unscoped.add(conn)
+            return
+        for topic in subscription.topics:
+            self._index.setdefault(topic, set()).add(conn)
+
+    def _index_remove(self, conn: Connection):
+        self._track_interest(conn.subscription, -1)
+        self._unscoped.discard(conn)
+        for topic in conn.subscription.topics:
+            conns = self._index.get(topic)
+            if conns is None:
+                continue
+            conns.discard(conn)
+            if not conns:
+                del self._index[topic]
+
+    def _remove(self, conn: Connection):
+        self._connections.discard(conn)
+        self._index_remove(conn)
+        self._dropped_closed += conn.dropped
+        metrics.ws_connections.labels(conn.transport).dec()
+
+    def _evict(self, conn: Connection, reason: str):
+        if conn not in self._connections:
+            return
+        self._remove(conn)
+        self.evicted += 1
+        metrics.ws_evictions.labels(reason).inc()
+        logger.info(f"Evicted slow or dead WebSocket: {conn.ws.client}")
+        # 1013 = "try again later"
+        asyncio.create_task(conn.close(code=1013))
+
+    def stats(self) -> dict:
+        depths = [conn.depth for conn in self._connections]
+        return {
+            "connections": len(depths),
+            "unscoped_connections": len(self._unscoped),
+            "delta_connections": sum(1 for conn in self._connections if conn.deltas),
+            "tracked_entities": len(self.tracker),
+            "topics": len(self._index),
+            "organizations": "*" if self._all_org_refs else sorted(self._org_refs),
+            "queued": sum(depths),
+            "max_queue_depth": max(depths, default=0),
+            "queue_capacity": self.max_queue,
+            "policy": self.policy,
+            "dropped": self._dropped_closed + sum(conn.dropped for conn in self._connections),
+            "evicted": self.evicted,
+        }
+
+
+broadcaster = Broadcaster(
+    max_queue=settings.WS_SEND_QUEUE_SIZE,
+    policy=settings.WS_SLOW_CONSUMER_POLICY,
+    send_timeout=settings.WS_SEND_TIMEOUT,
+    batch=settings.WS_COALESCE_WINDOW_MS > 0,
+)
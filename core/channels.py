@@ -0,0 +1,71 @@
+"""
+Redis pub/sub channel layout.
+
+Events are published on one channel per organization
+("status_updates:<org_id>", or "status_updates:unscoped" for events without
+one). A worker only subscribes to the organizations its WebSocket clients
+asked for, and falls back to the "status_updates:*" pattern while any
+client wants everything.
+"""
+
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_PREFIX = "status_updates"
+ALL_CHANNELS = f"{CHANNEL_PREFIX}:*"
+UNSCOPED_CHANNEL = f"{CHANNEL_PREFIX}:unscoped"
+
+
+def channel_for(organization_id: int | None) -> str:
+    if organization_id is None:
+        return UNSCOPED_CHANNEL
+    return f"{CHANNEL_PREFIX}:{organization_id}"
+
+
+class ChannelSubscriptions:
+    """
+    Tracks what a pub/sub connection is subscribed to and moves it to
+    whatever the broadcaster currently needs.
+
+    Set `changed` whenever the wanted organizations change; the listener
+    loop calls sync() before its next read.
+    """
+
+    def __init__(self, pubsub):
+        self.pubsub = pubsub
+        self.channels: set[str] = set()
+        self.pattern = False
+        self.changed = asyncio.Event()
+        self.changed.set()
+
+    async def sync(self, organizations: frozenset | None):
+        """
+        organizations=None means "every organization". New subscriptions
+        are made before old ones are dropped, so a switch can deliver an
+        event twice but never loses one.
+        """
+        if organizations is None:
+            if not self.pattern:
+                await self.pubsub.psubscribe(ALL_CHANNELS)
+                self.pattern = True
+                logger.info(f"Subscribed to Redis pattern: {ALL_CHANNELS}")
+            wanted = set()
+        else:
+            wanted = {channel_for(org_id) for org_id in organizations}
+
+        added = wanted - self.channels
+        removed = self.channels - wanted
+        if added:
+            await self.pubsub.subscribe(*added)
+        if self.pattern and organizations is not None:
+            await self.pubsub.punsubscribe(ALL_CHANNELS)
+            self.pattern = False
+            logger.info(f"Unsubscribed from Redis pattern: {ALL_CHANNELS}")
+        if removed:
+            await self.pubsub.unsubscribe(*removed)
+        self.channels = wanted
+
+        if added or removed:
+            logger.info(f"Redis channels: +{sorted(added)} -{sorted(removed)}")
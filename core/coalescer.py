@@ -0,0 +1,69 @@
+"""
+Coalescing stage between the Redis listener and the broadcaster.
+
+During an incident storm the same service can change many times a second.
+With a window configured, incoming frames are held for up to that long and
+only the latest one per service/incident is passed on; frames that do not
+describe an entity (no "id") are always kept. Everything is then handed to
+the broadcaster in one go, so each client's writer finds it queued together
+and sends it as a single batch frame.
+
+Frames are flushed in event order: a superseded frame is dropped and its
+replacement moves to the end, so the event_ids a client sees only go up.
+"""
+
+import asyncio
+import itertools
+from collections import OrderedDict
+
+from core.broadcaster import Broadcaster, broadcaster
+from core.config import settings
+from core.events import Frame
+
+
+class Coalescer:
+    def __init__(self, target: Broadcaster, window: float):
+        self.target = target
+        self.window = window
+        self.received = 0
+        self.coalesced = 0
+        self.flushes = 0
+        self._pending: OrderedDict = OrderedDict()
+        self._seq = itertools.count()
+        self._timer: asyncio.TimerHandle | None = None
+
+    def add(self, frame: Frame):
+        self.received += 1
+        if self.window <= 0:
+            self.target.publish(frame)
+            return
+
+        key = frame.key
+        if key is None:
+            key = next(self._seq)
+        elif self._pending.pop(key, None) is not None:
+            self.coalesced += 1
+        self._pending[key] = frame
+
+        if self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.window, self.flush)
+
+    def flush(self):
+        self._timer = None
+        frames = list(self._pending.values())
+        self._pending.clear()
+        self.flushes += 1
+        for frame in frames:
+            self.target.publish(frame)
+
+    def stats(self) -> dict:
+        return {
+            "window_ms": round(self.window * 1000),
+            "received": self.received,
+            "coalesced": self.coalesced,
+            "flushes": self.flushes,
+            "pending": len(self._pending),
+        }
+
+
+coalescer = Coalescer(broadcaster, window=settings.WS_COALESCE_WINDOW_MS / 1000)
@@ -5,6 +5,7 @@ Application configuration constants.
 Everything is hard-coded for PRODUCTION deployment.
 """
 
+import os
 from types import SimpleNamespace
 
 # -----------------------------------------------------------------------------
@@ -24,6 +25,16 @@ CLERK_JWKS_URL = "https://loving-gopher-42.clerk.accounts.dev/.well-known/jwks.j
 CLERK_ISSUER = "https://loving-gopher-42.clerk.accounts.dev"
 CLERK_AUDIENCE = "authenticated"
 
+# JWKS key manager (core/jwks.py)
+JWKS_TTL = 3600                    # keys older than this are refreshed in the background
+JWKS_MAX_STALE = 86400             # ...and never served past this age
+JWKS_MIN_REFRESH_INTERVAL = 30     # at most one unknown-kid refetch per this many seconds
+JWKS_NEGATIVE_TTL = 300            # how long an unknown kid is remembered
+JWKS_NEGATIVE_CACHE_SIZE = 1024    # ...and how many of them at most
+
+# Verified-token LRU (core/token_cache.py); 0 disables it
+TOKEN_CACHE_SIZE = 10000
+
 # -----------------------------------------------------------------------------
 # Database & Redis (force SSL/TLS)
 # -----------------------------------------------------------------------------
@@ -41,6 +52,96 @@ BACKEND_CORS_ORIGINS = [
     "https://statuspage-frontend.vercel.app",
 ]
 
+# -----------------------------------------------------------------------------
+# WebSocket fanout
+# -----------------------------------------------------------------------------
+# Every socket gets its own bounded send queue. When a client falls this far
+# behind, the slow-consumer policy decides what happens:
+#   "drop_oldest" – discard the oldest queued event
+#   "coalesce"    – keep only the latest queued event per service/incident
+#   "disconnect"  – close the socket; the client reconnects and resyncs
+WS_SEND_QUEUE_SIZE = 100
+WS_SLOW_CONSUMER_POLICY = "coalesce"
+WS_SEND_TIMEOUT = 10.0      # seconds a single send may block before eviction
+
+# Coalescing window between Redis and the sockets. Events arriving within it
+# are reduced to the latest one per service/incident, and whatever is queued
+# for a client is then sent as a single {"event_type": "batch"} frame. This
+# bounds the per-client frame rate during incident storms. 0 disables both.
+WS_COALESCE_WINDOW_MS = 0
+
+# Server-Sent Events (/events) share the fanout above.
+SSE_KEEPALIVE_INTERVAL = 15.0   # seconds between ": keep-alive" comments
+SSE_RETRY_MS = 3000             # reconnect delay suggested to EventSource
+
+# -----------------------------------------------------------------------------
+# Public status snapshot cache
+# -----------------------------------------------------------------------------
+# The snapshot is kept up to date by the outbox relay; this TTL only bounds how
+# long it can drift if a write is ever missed before it is rebuilt from the DB.
+PUBLIC_STATUS_CACHE_TTL = 3600  # seconds
+
+# Cache-Control on the public read endpoints. Responses carry strong ETags, so
+# browsers/CDNs can revalidate cheaply (304) once max-age has passed.
+PUBLIC_CACHE_MAX_AGE = 5                    # seconds
+PUBLIC_CACHE_STALE_WHILE_REVALIDATE = 30    # seconds
+PUBLIC_UPTIME_MAX_AGE = 60                  # seconds, /public/uptime
+
+# -----------------------------------------------------------------------------
+# Event log (resumable streams)
+# -----------------------------------------------------------------------------
+# Every published event is also appended to a capped Redis Stream, so a client
+# reconnecting with ?last_event_id= is replayed only what it missed.
+#   "redis" – Redis Stream, shared by all workers
+#   "local" – in-process buffer, for single-worker setups and benchmarks
+EVENT_LOG_BACKEND = "redis"
+EVENT_LOG_MAXLEN = 10000        # approximate number of events retained
+EVENT_LOG_REPLAY_LIMIT = 1000   # larger gaps get a "resync" instead of a replay
+
+# -----------------------------------------------------------------------------
+# Transactional outbox (core/outbox.py)
+# -----------------------------------------------------------------------------
+OUTBOX_BATCH_SIZE = 500         # events published per pipelined round trip
+OUTBOX_POLL_INTERVAL = 0.5      # seconds; picks up other workers' commits
+OUTBOX_RETENTION = 86400        # seconds sent rows are kept before purging
+
+# -----------------------------------------------------------------------------
+# Request instrumentation (db/instrumentation.py, api/server_timing.py)
+# -----------------------------------------------------------------------------
+SERVER_TIMING = True            # Server-Timing header and access log line per request
+SLOW_QUERY_MS = 200             # statements slower than this are logged; 0 disables
+SLOW_QUERY_EXPLAIN = False      # also log their plan (plain EXPLAIN, opt-in)
+
+# -----------------------------------------------------------------------------
+# Prometheus metrics (core/metrics.py, GET /metrics)
+# -----------------------------------------------------------------------------
+METRICS_ENABLED = True
+# Shared sample directory for multi-worker deployments; "" = this process only.
+# Must be emptied before the workers start.
+METRICS_MULTIPROC_DIR = ""
+
+# -----------------------------------------------------------------------------
+# Query budgets (db/query_budget.py)
+# -----------------------------------------------------------------------------
+# Over-budget requests raise when enforced, and are only logged otherwise.
+# Turn on for test and benchmark runs with QUERY_BUDGET_ENFORCE=1.
+QUERY_BUDGET_ENFORCE = os.getenv("QUERY_BUDGET_ENFORCE", str(DEBUG)).lower() in ("1", "true", "yes")
+
+# -----------------------------------------------------------------------------
+# Incident ingestion (POST /incidents/ingest)
+# -----------------------------------------------------------------------------
+INCIDENT_INGEST_MAX_BATCH = 5000    # alerts per request; larger bodies get a 413
+INCIDENT_INGEST_CHUNK = 1000        # rows per multi-row INSERT statement
+
+# -----------------------------------------------------------------------------
+# Status history compaction (core/history.py)
+# -----------------------------------------------------------------------------
+# Uptime is served from the daily rollups, so raw history only needs to stay
+# in service_status_updates for as long as people page through it.
+HISTORY_RETENTION_DAYS = 90         # older rows move to the archive table
+HISTORY_COMPACTION_INTERVAL = 3600  # seconds between compaction runs
+HISTORY_COMPACTION_BATCH = 1000     # rows moved per transaction
+
 # -----------------------------------------------------------------------------
 # Export a single global settings object
 # -----------------------------------------------------------------------------
@@ -55,4 +156,37 @@ settings = SimpleNamespace(
     CLERK_JWKS_URL=CLERK_JWKS_URL,
     CLERK_ISSUER=CLERK_ISSUER,
     CLERK_AUDIENCE=CLERK_AUDIENCE,
+    JWKS_TTL=JWKS_TTL,
+    JWKS_MAX_STALE=JWKS_MAX_STALE,
+    JWKS_MIN_REFRESH_INTERVAL=JWKS_MIN_REFRESH_INTERVAL,
+    JWKS_NEGATIVE_TTL=JWKS_NEGATIVE_TTL,
+    JWKS_NEGATIVE_CACHE_SIZE=JWKS_NEGATIVE_CACHE_SIZE,
+    TOKEN_CACHE_SIZE=TOKEN_CACHE_SIZE,
+    WS_SEND_QUEUE_SIZE=WS_SEND_QUEUE_SIZE,
+    WS_SLOW_CONSUMER_POLICY=WS_SLOW_CONSUMER_POLICY,
+    WS_SEND_TIMEOUT=WS_SEND_TIMEOUT,
+    WS_COALESCE_WINDOW_MS=WS_COALESCE_WINDOW_MS,
+    SSE_KEEPALIVE_INTERVAL=SSE_KEEPALIVE_INTERVAL,
+    SSE_RETRY_MS=SSE_RETRY_MS,
+    PUBLIC_STATUS_CACHE_TTL=PUBLIC_STATUS_CACHE_TTL,
+    PUBLIC_CACHE_MAX_AGE=PUBLIC_CACHE_MAX_AGE,
+    PUBLIC_CACHE_STALE_WHILE_REVALIDATE=PUBLIC_CACHE_STALE_WHILE_REVALIDATE,
+    PUBLIC_UPTIME_MAX_AGE=PUBLIC_UPTIME_MAX_AGE,
+    EVENT_LOG_BACKEND=EVENT_LOG_BACKEND,
+    EVENT_LOG_MAXLEN=EVENT_LOG_MAXLEN,
+    EVENT_LOG_REPLAY_LIMIT=EVENT_LOG_REPLAY_LIMIT,
+    OUTBOX_BATCH_SIZE=OUTBOX_BATCH_SIZE,
+    OUTBOX_POLL_INTERVAL=OUTBOX_POLL_INTERVAL,
+    OUTBOX_RETENTION=OUTBOX_RETENTION,
+    SERVER_TIMING=SERVER_TIMING,
+    SLOW_QUERY_MS=SLOW_QUERY_MS,
+    SLOW_QUERY_EXPLAIN=SLOW_QUERY_EXPLAIN,
+    METRICS_ENABLED=METRICS_ENABLED,
+    METRICS_MULTIPROC_DIR=METRICS_MULTIPROC_DIR,
+    QUERY_BUDGET_ENFORCE=QUERY_BUDGET_ENFORCE,
+    INCIDENT_INGEST_MAX_BATCH=INCIDENT_INGEST_MAX_BATCH,
+    INCIDENT_INGEST_CHUNK=INCIDENT_INGEST_CHUNK,
+    HISTORY_RETENTION_DAYS=HISTORY_RETENTION_DAYS,
+    HISTORY_COMPACTION_INTERVAL=HISTORY_COMPACTION_INTERVAL,
+    HISTORY_COMPACTION_BATCH=HISTORY_COMPACTION_BATCH,
 )
\ No newline at end of file
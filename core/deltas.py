@@ -0,0 +1,109 @@
+"""
+Snapshot-on-connect and field-level delta frames for /ws.
+
+A new socket first gets one "snapshot" frame: the public services and open
+incidents, tagged with the event_id it is current as of. After that, clients
+that opted into the delta protocol only receive the fields of an entity
+that changed since its previous event, plus the fields needed to route and
+identify it (id, organization_id, service_ids, event_id).
+
+The worker's DeltaTracker remembers the last event it saw for every
+service/incident and hands it to the next Frame about that entity, which
+then encodes its delta once (Frame.delta) for all delta clients. Every
+frame, full or delta, is meant to be merged into the client's copy of the
+entity; a frame with "deleted": true removes it.
+"""
+
+import json
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.events import Frame
+from core.status_cache import StatusCache, status_cache
+
+PROTOCOLS = ("full", "delta")
+
+
+class DeltaTracker:
+    """Last event seen per (event_type, id) on this worker."""
+
+    def __init__(self):
+        self._last: dict[tuple, dict] = {}
+
+    def observe(self, frame: Frame):
+        key = frame.key
+        if key is None:
+            return
+        if frame.event.get("deleted"):
+            self._last.pop(key, None)
+            return
+        frame.previous = self._last.get(key)
+        self._last[key] = frame.event
+
+    def clear(self):
+        """Forget everything."""
+        self._last.clear()
+
+    def retain(self, organization_ids: frozenset):
+        """
+        Forget every entity outside `organization_ids`. Called when this
+        worker stops listening to some organizations' channels, since the
+        events it misses for them would otherwise make later deltas wrong.
+        Entities of the organizations still listened to keep their deltas.
+        """
+        self._last = {
+            key: event for key, event in self._last.items()
+            if event.get("organization_id") in organization_ids
+        }
+
+    def __len__(self) -> int:
+        return len(self._last)
+
+
+def _visible(subscription, kind: str, entity: dict) -> bool:
+    if not subscription.accepts_type(kind):
+        return False
+    if not subscription.is_scoped:
+        return True
+    if entity.get("organization_id") in subscription.organization_ids:
+        return True
+    # The same service topics Frame.topics routes live events under; every
+    # incident event carries its linked service_ids, like the snapshot does
+    if kind == "service":
+        return entity["id"] in subscription.service_ids
+    return not subscription.service_ids.isdisjoint(entity.get("service_ids") or ())
+
+
+class SnapshotFrames:
+    """
+    Builds snapshot frames from the public status cache. The body is parsed
+    at most once per status version on each worker; unscoped clients get the
+    cached text with the snapshot header spliced in, without re-encoding.
+    """
+
+    def __init__(self, cache: StatusCache):
+        self.cache = cache
+        self._parsed: tuple[str, dict] | None = None
+
+    async def frame(self, db: AsyncSession, subscription, event_id: str | None) -> Frame:
+        versions = await self.cache.versions(db)
+        body = await self.cache.get(db, versions)
+        version = versions.versions["status"]
+        if self._parsed is None or self._parsed[0] != version:
+            self._parsed = (version, json.loads(body))
+        status = self._parsed[1]
+
+        header = {"event_type": "snapshot", "event_id": event_id, "version": version}
+        if not subscription.is_scoped and not subscription.event_types:
+            text = json.dumps(header)[:-1] + "," + body[1:]
+            return Frame({**header, **status}, text)
+
+        return Frame.from_event({
+            **header,
+            "services": [s for s in status["services"] if _visible(subscription, "service", s)],
+            "incidents": [i for i in status["incidents"] if _visible(subscription, "incident", i)],
+            "updated_at": status["updated_at"],
+        })
+
+
+snapshots = SnapshotFrames(status_cache)
@@ -0,0 +1,157 @@
+"""
+Durable, bounded log of published status events.
+
+Pub/sub is fire-and-forget, so every event is also appended to a capped
+Redis Stream. The stream assigns monotonically increasing ids, and the id
+is spliced into the published JSON as "event_id". A client that reconnects
+with the last id it saw is replayed only the events it missed, instead of
+re-downloading the whole status.
+
+LocalEventLog keeps the same semantics in process memory. It is meant for
+single-worker setups and benchmarks where Redis Streams are not available.
+"""
+
+import logging
+import time
+from collections import deque
+
+import redis.asyncio as redis
+
+from core import metrics
+from core.config import settings
+from core.redis_client import redis_client
+
+logger = logging.getLogger(__name__)
+
+STREAM_KEY = "status_events"
+
+_publish_latency = metrics.redis_publish_duration.labels("publish")
+_publish_many_latency = metrics.redis_publish_duration.labels("publish_many")
+
+# XADD + PUBLISH in one round trip, so the published copy carries the id
+# the stream assigned. The id is spliced into the JSON object as text;
+# nothing is decoded or re-encoded.
+_APPEND_AND_PUBLISH = """
+local id = redis.call('XADD', KEYS[1], 'MAXLEN', '~', ARGV[1], '*', 'data', ARGV[2])
+redis.call('PUBLISH', ARGV[3], '{"event_id":"' .. id .. '",' .. string.sub(ARGV[2], 2))
+return id
+"""
+
+
+def with_event_id(event_id: str, data: str) -> str:
+    """Python twin of the splice done in _APPEND_AND_PUBLISH."""
+    return '{"event_id":"' + event_id + '",' + data[1:]
+
+
+def parse_event_id(event_id: str) -> tuple[int, int]:
+    """Stream ids ("<ms>-<seq>") compare as integer pairs, not strings."""
+    ms, _, seq = event_id.partition("-")
+    return int(ms), int(seq or 0)
+
+
+class GapTooLarge(Exception):
+    """The requested id has been trimmed from the log; the client must resync."""
+
+
+class RedisEventLog:
+    def __init__(self, client: redis.Redis, maxlen: int, stream_key: str = STREAM_KEY):
+        self.redis = client
+        self.maxlen = maxlen
+        self.stream_key = stream_key
+        self._script = client.register_script(_APPEND_AND_PUBLISH)
+
+    async def publish(self, channel: str, data: str) -> str:
+        """Append `data` (a JSON object) and publish it with its event_id."""
+        with _publish_latency.time():
+            return await self._script(keys=[self.stream_key], args=[self.maxlen, data, channel])
+
+    async def publish_many(self, entries: list[tuple[str, str]]) -> list[str]:
+        """publish() for each (channel, data), pipelined into one round trip."""
+        with _publish_many_latency.time():
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for channel, data in entries:
+                    await self._script(keys=[self.stream_key], args=[self.maxlen, data, channel], client=pipe)
+                return await pipe.execute()
+
+    async def read_after(self, last_event_id: str, limit: int) -> list[tuple[str, str]]:
+        """
+        Events after `last_event_id`, oldest first, as (id, json-with-event_id).
+        Raises GapTooLarge when the log no longer reaches back that far or
+        more than `limit` events were missed.
+        """
+        try:
+            last = parse_event_id(last_event_id)
+        except ValueError:
+            raise GapTooLarge(last_event_id)
+
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.xrange(self.stream_key, min="-", max="+", count=1)
+            pipe.xrange(self.stream_key, min=f"({last_event_id}", max="+", count=limit + 1)
+            oldest, entries = await pipe.execute()
+
+        if oldest and parse_event_id(oldest[0][0]) > last:
+            # Everything retained is newer than last_event_id, so whatever
+            # sat between the two may have been trimmed away.
+            raise GapTooLarge(last_event_id)
+        if len(entries) > limit:
+            raise GapTooLarge(last_event_id)
+        return [(entry_id, with_event_id(entry_id, fields["data"])) for entry_id, fields in entries]
+
+    async def last_event_id(self) -> str | None:
+        entries = await self.redis.xrevrange(self.stream_key, max="+", min="-", count=1)
+        return entries[0][0] if entries else None
+
+
+class LocalEventLog:
+    """In-process stand-in for RedisEventLog with the same id scheme."""
+
+    def __init__(self, client: redis.Redis, maxlen: int):
+        self.redis = client
+        self.maxlen = maxlen
+        self._entries: deque[tuple[str, str]] = deque(maxlen=maxlen)
+        self._last = (0, 0)
+
+    def _next_id(self) -> str:
+        ms = int(time.time() * 1000)
+        last_ms, last_seq = self._last
+        self._last = (ms, 0) if ms > last_ms else (last_ms, last_seq + 1)
+        return f"{self._last[0]}-{self._last[1]}"
+
+    async def publish(self, channel: str, data: str) -> str:
+        event_id = self._next_id()
+        self._entries.append((event_id, data))
+        with _publish_latency.time():
+            await self.redis.publish(channel, with_event_id(event_id, data))
+        return event_id
+
+    async def publish_many(self, entries: list[tuple[str, str]]) -> list[str]:
+        return [await self.publish(channel, data) for channel, data in entries]
+
+    async def read_after(self, last_event_id: str, limit: int) -> list[tuple[str, str]]:
+        try:
+            last = parse_event_id(last_event_id)
+        except ValueError:
+            raise GapTooLarge(last_event_id)
+        if self._entries and parse_event_id(self._entries[0][0]) > last:
+            raise GapTooLarge(last_event_id)
+
+        missed = [
+            (entry_id, with_event_id(entry_id, data))
+            for entry_id, data in self._entries
+            if parse_event_id(entry_id) > last
+        ]
+        if len(missed) > limit:
+            raise GapTooLarge(last_event_id)
+        return missed
+
+    async def last_event_id(self) -> str | None:
+        return self._entries[-1][0] if self._entries else None
+
+
+def _make_event_log():
+    if settings.EVENT_LOG_BACKEND == "local":
+        return LocalEventLog(redis_client, maxlen=settings.EVENT_LOG_MAXLEN)
+    return RedisEventLog(redis_client, maxlen=settings.EVENT_LOG_MAXLEN)
+
+
+event_log = _make_event_log()
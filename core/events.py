@@ -0,0 +1,134 @@
+"""
+Status events as they travel from Redis to the sockets.
+
+A Frame is validated once when it comes off pub/sub and keeps the encoded
+text it arrived with, so fanning it out to N clients sends the same buffer
+N times instead of re-encoding it per client.
+"""
+
+import json
+
+import msgpack
+
+from core.event_log import parse_event_id
+
+FRAME_FORMATS = ("json", "msgpack", "sse")
+
+# Kept in delta frames, so they route and coalesce like full ones
+IDENTITY_FIELDS = ("event_type", "id", "organization_id", "service_ids", "event_id")
+
+
+def batch_text(frames: list["Frame"]) -> str:
+    """A {"event_type": "batch", "events": [...]} frame, by joining the encoded events."""
+    return '{"event_type":"batch","events":[' + ",".join(frame.text for frame in frames) + "]}"
+
+
+def batch_binary(frames: list["Frame"]) -> bytes:
+    """msgpack twin of batch_text, built from each frame's cached encoding."""
+    packer = msgpack.Packer()
+    return (
+        packer.pack_map_header(2)
+        + packer.pack("event_type") + packer.pack("batch")
+        + packer.pack("events") + packer.pack_array_header(len(frames))
+        + b"".join(frame.binary for frame in frames)
+    )
+
+
+class InvalidEvent(ValueError):
+    pass
+
+
+class Frame:
+    """A single validated event plus its wire encodings."""
+
+    __slots__ = ("event", "text", "previous", "_binary", "_sse", "_delta")
+
+    def __init__(self, event: dict, text: str):
+        self.event = event
+        self.text = text
+        # The previous event about the same entity, set by the DeltaTracker
+        self.previous: dict | None = None
+        self._binary: bytes | None = None
+        self._sse: str | None = None
+        self._delta: Frame | None = None
+
+    @classmethod
+    def from_raw(cls, raw: str | bytes) -> "Frame":
+        """Validate a raw pub/sub message, keeping its text as-is."""
+        if isinstance(raw, bytes):
+            raw = raw.decode()
+        try:
+            event = json.loads(raw)
+        except ValueError as e:
+            raise InvalidEvent(f"Invalid JSON: {e}") from e
+        if not isinstance(event, dict) or "event_type" not in event:
+            raise InvalidEvent("Event must be an object with an event_type")
+        return cls(event, raw)
+
+    @classmethod
+    def from_event(cls, event: dict) -> "Frame":
+        return cls(event, json.dumps(event))
+
+    @property
+    def binary(self) -> bytes:
+        """msgpack encoding, built on first use and shared by all clients."""
+        if self._binary is None:
+            self._binary = msgpack.packb(self.event)
+        return self._binary
+
+    @property
+    def sse(self) -> str:
+        """text/event-stream encoding; the event_id doubles as the SSE id."""
+        if self._sse is None:
+            event_id = self.event_id
+            prefix = f"id: {event_id}\n" if event_id else ""
+            self._sse = f"{prefix}data: {self.text}\n\n"
+        return self._sse
+
+    @property
+    def delta(self) -> "Frame":
+        """
+        Only the fields that changed since `previous` (plus IDENTITY_FIELDS),
+        built on first use. Without a baseline this is the frame itself.
+        """
+        if self.previous is None:
+            return self
+        if self._delta is None:
+            previous = self.previous
+            delta = {field: self.event[field] for field in IDENTITY_FIELDS if field in self.event}
+            delta["delta"] = True
+            for field, value in self.event.items():
+                if field not in delta and previous.get(field) != value:
+                    delta[field] = value
+            self._delta = Frame.from_event(delta)
+        return self._delta
+
+    @property
+    def event_id(self) -> str | None:
+        return self.event.get("event_id")
+
+    def is_after(self, event_id: str | None) -> bool:
+        """Whether this frame is newer than `event_id` in the event log."""
+        if event_id is None or self.event_id is None:
+            return True
+        return parse_event_id(self.event_id) > parse_event_id(event_id)
+
+    @property
+    def topics(self) -> list[tuple]:
+        """The organization/service topics this event is routed under."""
+        event = self.event
+        topics = []
+        if event.get("organization_id") is not None:
+            topics.append(("organization", event["organization_id"]))
+        if event["event_type"] == "service" and "id" in event:
+            topics.append(("service", event["id"]))
+        for service_id in event.get("service_ids") or ():
+            topics.append(("service", service_id))
+        return topics
+
+    @property
+    def key(self):
+        """Events about the same service/incident supersede each other."""
+        if "id" in self.event:
+            return (self.event["event_type"], self.event["id"])
+        return None
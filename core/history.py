@@ -0,0 +1,219 @@
+"""
+Retention and compaction of the raw status history.
+
+service_status_updates only grows: every write appends a row, and automated
+monitors re-report the same status over and over. Uptime no longer needs the
+raw rows (it reads the daily rollups plus each service's latest transition),
+so a background job keeps the hot table small by moving rows into
+service_status_updates_archive:
+
+  expired    rows older than HISTORY_RETENTION_DAYS
+  compacted  rows that repeat the status of the row before them; the run
+             they belong to already started at the earlier row
+
+A service's latest row is never moved. It is the open interval uptime is
+computed from, and the "previous" status record_status() closes.
+
+Both passes walk the services SERVICES_PER_BATCH at a time and move at
+most HISTORY_COMPACTION_BATCH rows per short transaction. The services of a
+batch are locked with SKIP LOCKED, the same row lock record_status() takes,
+so no status change can open or close an interval of a service while its
+rows are moved; a batch never waits on a write in progress, and a write
+waits at most one batch. Only one worker runs the job at a time.
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+
+import redis.asyncio as redis
+from redis.exceptions import LockError
+from sqlalchemy import delete, exists, func, insert, literal, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import aliased
+
+from core.config import settings
+from core.redis_client import redis_client
+from db.session import SessionLocal
+from models.service import Service, ServiceStatusUpdate, ServiceStatusUpdateArchive
+
+logger = logging.getLogger(__name__)
+
+LOCK_KEY = "history:compactor"
+
+# Services whose history is compacted per transaction
+SERVICES_PER_BATCH = 100
+
+_COLUMNS = [column.name for column in ServiceStatusUpdate.__table__.columns]
+
+
+async def _archive(db: AsyncSession, ids: list[int], reason: str):
+    history = ServiceStatusUpdate.__table__
+    await db.execute(
+        insert(ServiceStatusUpdateArchive).from_select(
+            _COLUMNS + ["reason"],
+            select(*[history.c[name] for name in _COLUMNS], literal(reason)).filter(history.c.id.in_(ids)),
+        )
+    )
+    await db.execute(delete(ServiceStatusUpdate).filter(ServiceStatusUpdate.id.in_(ids)))
+
+
+class HistoryCompactor:
+    def __init__(
+            self,
+            session_factory: async_sessionmaker,
+            client: redis.Redis,
+            *,
+            retention_days: int = 90,
+            interval: float = 3600,
+            batch_size: int = 1000,
+    ):
+        self.session_factory = session_factory
+        self.redis = client
+        self.retention_days = retention_days
+        self.interval = interval
+        self.batch_size = batch_size
+        self.expired = 0
+        self.compacted = 0
+        self.runs = 0
+        self.last_run_seconds: float | None = None
+        self._task: asyncio.Task | None = None
+
+    @staticmethod
+    async def _lock_services(db: AsyncSession, after: int) -> list[int]:
+        """Lock the next services after id `after` that no write holds."""
+        return (await db.execute(
+            select(Service.id)
+            .filter(Service.id > after)
+            .order_by(Service.id)
+            .limit(SERVICES_PER_BATCH)
+            .with_for_update(skip_locked=True)
+        )).scalars().all()
+
+    async def expire(self, after: int = 0, now: datetime | None = None) -> tuple[int | None, int]:
+        """
+        Archive rows past the retention horizon of the next services after
+        id `after`. Returns the id to continue from (None when done) and the
+        rows moved.
+        """
+        cutoff = (now or datetime.utcnow()) - timedelta(days=self.retention_days)
+        history = ServiceStatusUpdate
+        newer = aliased(ServiceStatusUpdate)
+        async with self.session_factory() as db:
+            service_ids = await self._lock_services(db, after)
+            if not service_ids:
+                return None, 0
+
+            ids = (await db.execute(
+                select(history.id)
+                .filter(
+                    history.service_id.in_(service_ids),
+                    history.created_at < cutoff,
+                    exists().where(newer.service_id == history.service_id, newer.created_at > history.created_at),
+                )
+                .order_by(history.id)
+                .limit(self.batch_size)
+            )).scalars().all()
+            if ids:
+                await _archive(db, ids, "expired")
+            await db.commit()
+
+        self.expired += len(ids)
+        return (after if len(ids) == self.batch_size else service_ids[-1]), len(ids)
+
+    async def compact(self, after: int = 0) -> tuple[int | None, int]:
+        """
+        Archive repeated statuses of the next services after id `after`.
+        Returns the id to continue from (None when done) and the rows moved.
+        """
+        history = ServiceStatusUpdate
+        async with self.session_factory() as db:
+            service_ids = await self._lock_services(db, after)
+            if not service_ids:
+                return None, 0
+
+            order = (history.created_at, history.id)
+            ranked = select(
+                history.id,
+                history.status,
+                func.lag(history.status).over(partition_by=history.service_id, order_by=order).label("previous"),
+                func.lead(history.id).over(partition_by=history.service_id, order_by=order).label("next"),
+            ).filter(history.service_id.in_(service_ids)).subquery()
+            ids = (await db.execute(
+                select(ranked.c.id)
+                .filter(ranked.c.status == ranked.c.previous, ranked.c.next.is_not(None))
+                .limit(self.batch_size)
+            )).scalars().all()
+            if ids:
+                await _archive(db, ids, "compacted")
+            await db.commit()
+
+        self.compacted += len(ids)
+        # A full batch may have left rows behind in these services; go again
+        return (after if len(ids) == self.batch_size else service_ids[-1]), len(ids)
+
+    async def run_once(self) -> bool:
+        """One full pass over the table. False when another worker is running it."""
+        lock = self.redis.lock(LOCK_KEY, timeout=self.interval, blocking=False)
+        if not await lock.acquire():
+            return False
+        started = time.monotonic()
+        try:
+            after = 0
+            while after is not None:
+                after, _ = await self.expire(after)
+            after = 0
+            while after is not None:
+                after, _ = await self.compact(after)
+        finally:
+            try:
+                await lock.release()
+            except LockError:
+                pass
+
+        self.runs += 1
+        self.last_run_seconds = round(time.monotonic() - started, 3)
+        logger.info(
+            f"History compaction: {self.expired} expired, {self.compacted} compacted "
+            f"so far, run took {self.last_run_seconds}s"
+        )
+        return True
+
+    async def _run(self):
+        while True:
+            try:
+                await self.run_once()
+            except (redis.RedisError, SQLAlchemyError) as e:
+                logger.error(f"History compaction failed: {e}")
+            except Exception:
+                # The job must survive anything, or the history grows unchecked
+                logger.exception("History compaction failed unexpectedly")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def aclose(self):
+        if self._task and not self._task.done():
+            self._task.cancel()
+        self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "expired": self.expired,
+            "compacted": self.compacted,
+            "runs": self.runs,
+            "last_run_seconds": self.last_run_seconds,
+        }
+
+
+history_compactor = HistoryCompactor(
+    SessionLocal,
+    redis_client,
+    retention_days=settings.HISTORY_RETENTION_DAYS,
+    interval=settings.HISTORY_COMPACTION_INTERVAL,
+    batch_size=settings.HISTORY_COMPACTION_BATCH,
+)
@@ -0,0 +1,176 @@
+"""
+JWKS key manager for Clerk token verification.
+
+Keys are fetched through one pooled httpx client and refreshed in the
+background. Once they are older than `ttl` they are still served while a
+refresh runs (stale-while-revalidate). Concurrent refreshes share one
+in-flight request (single-flight). A `kid` that is not in the key set can
+trigger at most one refetch per `min_refresh_interval`. Only a kid that a
+refetch actually ran for and did not find is remembered as unknown, for
+`negative_ttl`, in an LRU of at most `max_unknown` kids. A burst of tokens
+with bogus key ids therefore costs at most one outbound request, while a
+kid that arrives during the rate limit is looked up once it has passed.
+
+The manager takes an optional httpx.AsyncClient, so it can be pointed at a
+local stub JWKS server (or an httpx.MockTransport) in tests.
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+
+class JWKSError(Exception):
+    """The key set could not be fetched and there is nothing usable cached."""
+
+
+class UnknownKeyError(Exception):
+    """The token's kid is not in the (freshly checked) key set."""
+
+
+class JWKSKeyManager:
+    def __init__(
+            self,
+            jwks_url: str,
+            *,
+            ttl: float = 3600,
+            max_stale: float = 86400,
+            refresh_interval: float | None = None,
+            min_refresh_interval: float = 30,
+            negative_ttl: float = 300,
+            max_unknown: int = 1024,
+            timeout: float = 5.0,
+            client: httpx.AsyncClient | None = None,
+    ):
+        self.jwks_url = jwks_url
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.refresh_interval = refresh_interval or ttl / 2
+        self.min_refresh_interval = min_refresh_interval
+        self.negative_ttl = negative_ttl
+        self.max_unknown = max_unknown
+
+        self._owns_client = client is None
+        self._client = client or httpx.AsyncClient(timeout=timeout)
+        self._keys: dict[str, dict] = {}
+        self._fetched_at: float | None = None
+        self._last_attempt: float | None = None
+        self._unknown: OrderedDict[str, float] = OrderedDict()   # kid -> remembered until
+        self._inflight: asyncio.Task | None = None
+        self._background: asyncio.Task | None = None
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+    def _age(self) -> float:
+        if self._fetched_at is None:
+            return float("inf")
+        return time.monotonic() - self._fetched_at
+
+    async def get_key(self, kid: str) -> dict:
+        age = self._age()
+        if age > self.max_stale:
+            # Nothing cached, or too old to trust: the caller has to wait.
+            await self.refresh()
+        elif age > self.ttl:
+            self._refresh_in_background()
+
+        key = self._keys.get(kid)
+        if key is not None:
+            return key
+
+        now = time.monotonic()
+        remembered_until = self._unknown.get(kid)
+        if remembered_until is not None:
+            if remembered_until > now:
+                raise UnknownKeyError(kid)
+            del self._unknown[kid]
+
+        # A kid we have not seen may mean the keys were rotated, but only
+        # go and look if we have not done so very recently.
+        if self._last_attempt is None or now - self._last_attempt >= self.min_refresh_interval:
+            fetched_at = self._fetched_at
+            try:
+                await self.refresh()
+            except JWKSError:
+                pass
+            key = self._keys.get(kid)
+            if key is not None:
+                return key
+            # Only a key set fetched just now proves the kid unknown; a
+            # failed refresh (or a skipped one, below) proves nothing.
+            if self._fetched_at != fetched_at:
+                self._remember_unknown(kid, now)
+
+        raise UnknownKeyError(kid)
+
+    def _remember_unknown(self, kid: str, now: float):
+        self._unknown[kid] = now + self.negative_ttl
+        self._unknown.move_to_end(kid)
+        while len(self._unknown) > self.max_unknown:
+            self._unknown.popitem(last=False)
+
+    # ------------------------------------------------------------------
+    # Refreshing
+    # ------------------------------------------------------------------
+    async def refresh(self):
+        """Fetch the key set; concurrent callers share one request."""
+        if self._inflight is None or self._inflight.done():
+            self._inflight = asyncio.create_task(self._fetch())
+        # shield: a cancelled waiter must not cancel everyone else's fetch
+        await asyncio.shield(self._inflight)
+
+    def _refresh_in_background(self):
+        if self._inflight is None or self._inflight.done():
+            self._inflight = asyncio.create_task(self._fetch())
+            self._inflight.add_done_callback(self._log_background_failure)
+
+    @staticmethod
+    def _log_background_failure(task: asyncio.Task):
+        if not task.cancelled() and task.exception():
+            logger.warning(f"Background JWKS refresh failed: {task.exception()}")
+
+    async def _fetch(self):
+        self._last_attempt = time.monotonic()
+        try:
+            resp = await self._client.get(self.jwks_url)
+            resp.raise_for_status()
+            keys = {key["kid"]: key for key in resp.json()["keys"]}
+        except (httpx.HTTPError, ValueError, KeyError, TypeError) as e:
+            if self._keys and self._age() <= self.max_stale:
+                logger.warning(f"JWKS refresh failed, serving cached keys: {e}")
+                return
+            raise JWKSError(f"Failed to fetch JWKS: {e}") from e
+
+        self._keys = keys
+        self._fetched_at = time.monotonic()
+        # A rotation may have introduced kids we had marked as unknown
+        for kid in keys:
+            self._unknown.pop(kid, None)
+        logger.info(f"JWKS refreshed: {len(keys)} keys")
+
+    async def _refresh_loop(self):
+        while True:
+            try:
+                await self.refresh()
+            except JWKSError as e:
+                logger.warning(str(e))
+            await asyncio.sleep(self.refresh_interval)
+
+    def start(self):
+        """Keep the key set warm in the background."""
+        if self._background is None:
+            self._background = asyncio.create_task(self._refresh_loop())
+
+    async def aclose(self):
+        for task in (self._background, self._inflight):
+            if task and not task.done():
+                task.cancel()
+        self._background = None
+        if self._owns_client:
+            await self._client.aclose()
@@ -0,0 +1,97 @@
+"""
+Prometheus metrics, served at GET /metrics.
+
+With METRICS_MULTIPROC_DIR set (or PROMETHEUS_MULTIPROC_DIR in the
+environment), every uvicorn worker writes its samples to its own mmap'ed
+files in that directory and /metrics, answered by whichever worker, merges
+them all. Incrementing a value is a write to the worker's own file, with no
+lock shared between processes and no IPC. The directory must exist and be
+emptied before the workers start. The gauges use "livesum", so a worker that
+exits (mark_process_dead at shutdown) drops out of them.
+
+Without a directory the default in-process registry is used, which is
+enough for a single worker.
+"""
+
+import os
+
+from core.config import settings
+
+if settings.METRICS_MULTIPROC_DIR:
+    # Read by prometheus_client at import time
+    os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", settings.METRICS_MULTIPROC_DIR)
+    os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
+
+from prometheus_client import (  # noqa: E402
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+MULTIPROCESS = bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+# Sub-millisecond resolution for work that never touches the network
+FAST_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1)
+
+http_request_duration = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"],
+)
+db_pool_checkout_wait = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a connection from the SQLAlchemy pool",
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30),
+)
+db_pool_in_use = Gauge(
+    "db_pool_connections_in_use",
+    "Connections currently checked out of the pool",
+    multiprocess_mode="livesum",
+)
+db_pool_size = Gauge(
+    "db_pool_size",
+    "Configured pool size (excluding overflow)",
+    multiprocess_mode="livesum",
+)
+redis_publish_duration = Histogram(
+    "redis_publish_duration_seconds",
+    "Latency of publishing events to Redis (stream append + pub/sub)",
+    ["operation"],
+    buckets=FAST_BUCKETS + (0.25, 0.5, 1),
+)
+ws_connections = Gauge(
+    "ws_connections",
+    "Clients connected to the fanout",
+    ["transport"],
+    multiprocess_mode="livesum",
+)
+fanout_duration = Histogram(
+    "fanout_duration_seconds",
+    "Time to queue one event for every interested client",
+    buckets=FAST_BUCKETS,
+)
+ws_evictions = Counter(
+    "ws_evictions_total",
+    "Clients disconnected by the fanout",
+    ["reason"],
+)
+
+
+def render() -> tuple[bytes, str]:
+    """The exposition body and its content type, merged across workers if needed."""
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead():
+    """Drop this worker's live gauges; call when the worker shuts down."""
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(os.getpid())
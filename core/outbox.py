@@ -0,0 +1,229 @@
+"""
+Transactional outbox for status events.
+
+Write paths stage their event with add_event() in the same transaction as
+the change itself, so an event exists if and only if the change committed,
+and the request never waits on Redis. The OutboxRelay drains unsent rows in
+batches: it brings the public status cache up to date for the whole batch,
+publishes every event through the event log in one pipelined round trip,
+and marks the rows as sent. A row that cannot be processed (a payload
+that does not parse, or an entity the status cache cannot encode) is
+dead-lettered: marked as sent with its error, logged, and skipped, so it
+cannot hold up the rows behind it. Redis and database errors are not the
+row's fault; the whole batch is retried for those.
+
+Only one relay drains at a time (a Redis lock shared by all workers), and
+it publishes in outbox id order. That is the order the rows were inserted,
+not strictly the order their transactions committed: when two transactions
+overlap, the one that inserted later may commit, and be published, first.
+Status changes of one service are serialized by the row lock
+record_status() takes before staging the event, so they still go out in
+order. The worker that committed wakes its own relay right away via
+notify(); the others poll every OUTBOX_POLL_INTERVAL, which also picks up
+rows left behind by a crash.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from datetime import datetime, timedelta
+
+import redis.asyncio as redis
+from redis.exceptions import LockError
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from core.channels import channel_for
+from core.config import settings
+from core.event_log import event_log
+from core.redis_client import redis_client
+from core.status_cache import status_cache
+from db.session import SessionLocal
+from models.outbox import OutboxEvent
+
+logger = logging.getLogger(__name__)
+
+LOCK_KEY = "outbox:relay"
+
+
+def add_event(db: AsyncSession, event: dict):
+    """Stage `event` for publishing once the caller's transaction commits."""
+    db.add(OutboxEvent(
+        channel=channel_for(event.get("organization_id")),
+        payload=json.dumps(event),
+    ))
+
+
+async def add_events(db: AsyncSession, events: list[dict]):
+    """add_event() for a batch, as one multi-row INSERT rather than one ORM object each."""
+    if events:
+        await db.execute(insert(OutboxEvent), [
+            {"channel": channel_for(event.get("organization_id")), "payload": json.dumps(event)}
+            for event in events
+        ])
+
+
+class OutboxRelay:
+    def __init__(
+            self,
+            session_factory: async_sessionmaker,
+            client: redis.Redis,
+            *,
+            batch_size: int = 500,
+            poll_interval: float = 0.5,
+            retention: float = 86400,
+    ):
+        self.session_factory = session_factory
+        self.redis = client
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self.published = 0
+        self.batches = 0
+        self.dead_lettered = 0
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._last_purge = 0.0
+
+    def notify(self):
+        """Drain now rather than at the next poll; call after committing an event."""
+        self._wakeup.set()
+
+    async def drain(self) -> int | None:
+        """
+        Publish one batch. Returns how many events were sent or
+        dead-lettered, or None when another worker's relay holds the lock.
+        """
+        lock = self.redis.lock(LOCK_KEY, timeout=30, blocking=False)
+        if not await lock.acquire():
+            return None
+        try:
+            async with self.session_factory() as db:
+                rows = (await db.execute(
+                    select(OutboxEvent)
+                    .filter(OutboxEvent.sent_at.is_(None))
+                    .order_by(OutboxEvent.id)
+                    .limit(self.batch_size)
+                    .with_for_update(skip_locked=True)
+                )).scalars().all()
+                if not rows:
+                    return 0
+
+                # The cache goes first, so a snapshot tagged with an event_id
+                # always contains that event's change.
+                rows, failed = await self._apply_to_cache(db, rows)
+                if rows:
+                    await event_log.publish_many([(row.channel, row.payload) for row in rows])
+
+                now = datetime.utcnow()
+                if rows:
+                    await db.execute(
+                        update(OutboxEvent)
+                        .filter(OutboxEvent.id.in_([row.id for row in rows]))
+                        .values(sent_at=now)
+                    )
+                for row, error in failed:
+                    logger.error(f"Dead-lettered outbox event {row.id}: {error}")
+                    await db.execute(
+                        update(OutboxEvent).filter(OutboxEvent.id == row.id).values(sent_at=now, error=error)
+                    )
+                await db.commit()
+        finally:
+            try:
+                await lock.release()
+            except LockError:
+                pass
+
+        self.published += len(rows)
+        self.dead_lettered += len(failed)
+        self.batches += 1
+        return len(rows) + len(failed)
+
+    @staticmethod
+    async def _apply_to_cache(db: AsyncSession, rows: list[OutboxEvent]):
+        """
+        Update the status cache for a batch. Returns the rows to publish and
+        the (row, error) pairs to dead-letter. Only when the whole batch
+        fails is it retried row by row, to find the culprits.
+        """
+        parsed, failed = [], []
+        for row in rows:
+            try:
+                parsed.append((row, json.loads(row.payload)))
+            except ValueError as e:
+                failed.append((row, f"invalid payload: {e}"))
+        try:
+            await status_cache.apply_events(db, [event for _, event in parsed])
+            return [row for row, _ in parsed], failed
+        except (redis.RedisError, SQLAlchemyError):
+            raise
+        except Exception:
+            pass
+
+        good = []
+        for row, event in parsed:
+            try:
+                await status_cache.apply_events(db, [event])
+            except (redis.RedisError, SQLAlchemyError):
+                raise
+            except Exception as e:
+                failed.append((row, f"{type(e).__name__}: {e}"))
+            else:
+                good.append(row)
+        return good, failed
+
+    async def purge(self):
+        """Delete rows that were sent more than `retention` seconds ago."""
+        cutoff = datetime.utcnow() - timedelta(seconds=self.retention)
+        async with self.session_factory() as db:
+            # Dead letters are kept for inspection
+            result = await db.execute(
+                delete(OutboxEvent).filter(OutboxEvent.sent_at < cutoff, OutboxEvent.error.is_(None))
+            )
+            await db.commit()
+        if result.rowcount:
+            logger.info(f"Purged {result.rowcount} sent outbox events")
+
+    async def _run(self):
+        while True:
+            try:
+                sent = await self.drain()
+                if sent == self.batch_size:
+                    continue    # more waiting
+                if time.monotonic() - self._last_purge > 3600:
+                    self._last_purge = time.monotonic()
+                    await self.purge()
+            except (redis.RedisError, SQLAlchemyError) as e:
+                logger.error(f"Outbox relay failed: {e}")
+            except Exception:
+                # Bad rows are dead-lettered in drain(); anything else must
+                # not end the loop, or nothing is published until a restart
+                logger.exception("Outbox relay failed unexpectedly")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def aclose(self):
+        if self._task and not self._task.done():
+            self._task.cancel()
+        self._task = None
+
+    def stats(self) -> dict:
+        return {"published": self.published, "batches": self.batches, "dead_lettered": self.dead_lettered}
+
+
+outbox_relay = OutboxRelay(
+    SessionLocal,
+    redis_client,
+    batch_size=settings.OUTBOX_BATCH_SIZE,
+    poll_interval=settings.OUTBOX_POLL_INTERVAL,
+    retention=settings.OUTBOX_RETENTION,
+)
@@ -0,0 +1,170 @@
+"""
+Daily status rollups (service_status_daily).
+
+Every status write goes through record_status(), or record_statuses() for
+many services at once. It closes the interval of the status being replaced,
+splits that interval at UTC midnights and adds each piece to its
+(service_id, day) row with an upsert, all in the caller's transaction.
+The service row is locked first, so two concurrent writes for the same
+service cannot both close the same interval.
+
+The interval that is still open (from the latest transition to now) is not
+in the table; readers add it themselves (see core/uptime.py). Rows written
+before this table existed are backfilled by the Alembic migration that
+creates it, using daily_seconds().
+"""
+
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Iterable, Iterator
+
+from sqlalchemy import and_, func, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.service import Service, ServiceStatusDaily, ServiceStatusUpdate
+
+STATES = ("operational", "degraded", "partial_outage", "major_outage")
+
+
+def _utc(dt: datetime) -> datetime:
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt.astimezone(timezone.utc)
+
+
+def split_by_day(start: datetime, end: datetime) -> Iterator[tuple[date, float]]:
+    """(day, seconds) pieces of [start, end), cut at UTC midnight."""
+    start, end = _utc(start), _utc(end)
+    while start < end:
+        midnight = datetime.combine(start.date() + timedelta(days=1), time.min, tzinfo=timezone.utc)
+        piece_end = min(end, midnight)
+        yield start.date(), (piece_end - start).total_seconds()
+        start = piece_end
+
+
+def daily_seconds(transitions: Iterable[tuple[int, datetime, str]]) -> dict[tuple[int, date], dict[str, float]]:
+    """
+    Fold (service_id, at, status) transitions, ordered by service then
+    time, into seconds per status per (service_id, day). Only intervals
+    closed by a later transition are counted.
+    """
+    totals: dict[tuple[int, date], dict[str, float]] = {}
+    previous = None
+    for service_id, at, status in transitions:
+        if previous and previous[0] == service_id and previous[2] in STATES:
+            for day, seconds in split_by_day(previous[1], at):
+                row = totals.setdefault((service_id, day), dict.fromkeys(STATES, 0.0))
+                row[previous[2]] += seconds
+        previous = (service_id, at, status)
+    return totals
+
+
+def rollup_rows(totals: dict[tuple[int, date], dict[str, float]]) -> list[dict]:
+    return [
+        {"service_id": service_id, "day": day, **{f"{state}_seconds": seconds[state] for state in STATES}}
+        for (service_id, day), seconds in totals.items()
+    ]
+
+
+async def _add(db: AsyncSession, totals: dict[tuple[int, date], dict[str, float]]):
+    """Upsert, adding to the seconds already stored for each (service_id, day)."""
+    if not totals:
+        return
+    dialect = db.bind.dialect.name
+    insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+    stmt = insert(ServiceStatusDaily).values(rollup_rows(totals))
+    columns = [f"{state}_seconds" for state in STATES]
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["service_id", "day"],
+        set_={col: getattr(ServiceStatusDaily, col) + getattr(stmt.excluded, col) for col in columns},
+    )
+    await db.execute(stmt)
+
+
+async def latest_transitions(db: AsyncSession, service_ids, end: datetime):
+    """(service_id, at, status) of each service's latest transition up to `end`."""
+    history = ServiceStatusUpdate
+    latest = select(history.service_id, func.max(history.created_at).label("at")).filter(
+        history.created_at <= end,
+    )
+    if service_ids is not None:
+        latest = latest.filter(history.service_id.in_(service_ids))
+    latest = latest.group_by(history.service_id).subquery()
+    stmt = select(history.service_id, history.created_at, history.status).join(
+        latest,
+        and_(history.service_id == latest.c.service_id, history.created_at == latest.c.at),
+    )
+    return (await db.execute(stmt)).all()
+
+
+async def record_status(
+        db: AsyncSession,
+        service_id: int,
+        status: str,
+        *,
+        created_by: int | None = None,
+        message: str | None = None,
+        at: datetime | None = None,
+) -> ServiceStatusUpdate:
+    """Add a status history row and roll the interval it closes into the daily table."""
+    at = at or datetime.utcnow()
+    await db.execute(select(Service.id).filter(Service.id == service_id).with_for_update())
+    previous = (await db.execute(
+        select(ServiceStatusUpdate.created_at, ServiceStatusUpdate.status)
+        .filter(ServiceStatusUpdate.service_id == service_id, ServiceStatusUpdate.created_at <= at)
+        .order_by(ServiceStatusUpdate.created_at.desc(), ServiceStatusUpdate.id.desc())
+        .limit(1)
+    )).first()
+    if previous is not None:
+        await _add(db, daily_seconds([(service_id, previous[0], previous[1]), (service_id, at, status)]))
+
+    record = ServiceStatusUpdate(
+        service_id=service_id,
+        status=status,
+        message=message,
+        created_by=created_by,
+        created_at=at,
+        updated_at=at,
+    )
+    db.add(record)
+    # The session does not autoflush; make the row visible to the next call
+    await db.flush()
+    return record
+
+
+async def record_statuses(
+        db: AsyncSession,
+        statuses: dict[int, tuple[str, str | None]],
+        *,
+        created_by: int | None = None,
+        at: datetime | None = None,
+):
+    """
+    record_status() for many services at once: {service_id: (status, message)}.
+    One lock, one read of the previous transitions, one upsert and one
+    multi-row INSERT, however many services change.
+    """
+    if not statuses:
+        return
+    at = at or datetime.utcnow()
+    service_ids = sorted(statuses)
+    await db.execute(select(Service.id).filter(Service.id.in_(service_ids)).order_by(Service.id).with_for_update())
+
+    previous = {service_id: (prev_at, prev_status)
+                for service_id, prev_at, prev_status in await latest_transitions(db, service_ids, at)}
+    transitions = []
+    for service_id in service_ids:
+        if service_id in previous:
+            transitions.append((service_id, *previous[service_id]))
+        transitions.append((service_id, at, statuses[service_id][0]))
+    await _add(db, daily_seconds(transitions))
+
+    await db.execute(insert(ServiceStatusUpdate), [
+        {
+            "service_id": service_id,
+            "status": status,
+            "message": message,
+            "created_by": created_by,
+            "created_at": at,
+            "updated_at": at,
+        }
+        for service_id, (status, message) in statuses.items()
+    ])
@@ -0,0 +1,40 @@
+"""
+Server-Sent Events transport for the broadcaster.
+
+An SSEStream stands in for the WebSocket of a broadcaster Connection, so
+event-stream clients get the same per-client queue, filtering, slow-consumer
+policy, replay and snapshot handling as /ws. The Connection's writer hands
+it pre-encoded chunks (Frame.sse) one at a time, and the response body
+generator yields them. The single-slot queue between the two keeps the
+writer from running ahead of the client.
+"""
+
+import asyncio
+
+
+class SSEStream:
+    def __init__(self, client):
+        self.client = client
+        self.closed = False
+        self._chunks: asyncio.Queue = asyncio.Queue(maxsize=1)
+
+    async def send_text(self, chunk: str):
+        await self._chunks.put(chunk)
+
+    async def close(self, code: int = 1000):
+        self.closed = True
+        if not self._chunks.full():
+            # Wake the generator; a chunk already queued is still delivered
+            self._chunks.put_nowait(None)
+
+    async def chunks(self, keepalive: float):
+        """Yield queued chunks, and a comment line whenever `keepalive` passes quietly."""
+        while not self.closed or not self._chunks.empty():
+            try:
+                chunk = await asyncio.wait_for(self._chunks.get(), keepalive)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            if chunk is None:
+                return
+            yield chunk
@@ -0,0 +1,230 @@
+"""
+Materialized /public/status snapshot and public dataset versions.
+
+Redis holds one hash of pre-encoded PublicService JSON, one of unresolved
+PublicStatusIncident JSON, and a hash of version counters for the "status",
+"services" and "incidents" datasets. The outbox relay patches the entries
+each batch of events refers to in place and bumps the matching versions.
+Reads compare the status version against an in-process copy of the encoded
+body, so the common case is one Redis round trip and no JSON work at all. The database
+is only read when the snapshot is missing (cold start or TTL expiry).
+
+The version counters never expire and carry a random epoch, so they can be
+used as strong ETags: a value is never reused for different content, even
+after Redis is flushed.
+"""
+
+import logging
+import uuid
+from datetime import datetime
+
+import redis.asyncio as redis
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from core.config import settings
+from core.redis_client import redis_client
+from models.incident import Incident
+from models.service import Service
+from schemas.public import PublicService, PublicStatusIncident
+
+logger = logging.getLogger(__name__)
+
+SERVICES_KEY = "public_status:services"
+INCIDENTS_KEY = "public_status:incidents"
+META_KEY = "public_status:meta"
+SNAPSHOT_KEY = "public_status:snapshot"
+VERSIONS_KEY = "public_status:versions"
+
+DATASETS = ("status", "services", "incidents")
+
+
+def _encode_service(service: Service) -> str:
+    return PublicService.model_validate(service).model_dump_json()
+
+
+def _encode_incident(incident: Incident) -> str:
+    return PublicStatusIncident.model_validate(incident).model_dump_json()
+
+
+def _by_id(entries: dict) -> list[str]:
+    return [entries[key] for key in sorted(entries, key=int)]
+
+
+class DatasetVersions:
+    """Current version and last-change time of each public dataset."""
+
+    def __init__(self, fields: dict):
+        epoch = fields["epoch"]
+        self.versions = {name: f"{epoch}-{fields.get(name) or 0}" for name in DATASETS}
+        self.changed_at = {
+            name: datetime.fromisoformat(fields[f"{name}_at"]) if fields.get(f"{name}_at") else None
+            for name in DATASETS
+        }
+
+    def etag(self, dataset: str) -> str:
+        return f'"{dataset}-{self.versions[dataset]}"'
+
+
+class StatusCache:
+    def __init__(self, client: redis.Redis, ttl: int):
+        self.redis = client
+        self.ttl = ttl
+        # (version, encoded body) of the last snapshot this worker served
+        self._local: tuple[str, str] | None = None
+
+    # ------------------------------------------------------------------
+    # Read path
+    # ------------------------------------------------------------------
+    async def versions(self, db: AsyncSession) -> DatasetVersions:
+        """One round trip in the common case; loads the snapshot if it is cold."""
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.hgetall(VERSIONS_KEY)
+            pipe.hget(META_KEY, "loaded")
+            fields, loaded = await pipe.execute()
+
+        if not loaded:
+            await self._load(db)
+            fields = await self.redis.hgetall(VERSIONS_KEY)
+        if not fields.get("epoch"):
+            await self.redis.hsetnx(VERSIONS_KEY, "epoch", uuid.uuid4().hex[:8])
+            fields = await self.redis.hgetall(VERSIONS_KEY)
+        return DatasetVersions(fields)
+
+    async def get(self, db: AsyncSession, versions: DatasetVersions | None = None) -> str:
+        """Return the encoded PublicStatus body."""
+        if versions is None:
+            versions = await self.versions(db)
+        version = versions.versions["status"]
+
+        if self._local and self._local[0] == version:
+            return self._local[1]
+
+        cached = await self.redis.get(SNAPSHOT_KEY)
+        if cached:
+            cached_version, body = cached.split(" ", 1)
+            if cached_version == version:
+                self._local = (version, body)
+                return body
+
+        body = await self._build()
+        # Tagged with the version read *before* the hashes, so a concurrent
+        # write can only make the stored body newer than its tag, never older.
+        await self.redis.set(SNAPSHOT_KEY, f"{version} {body}", ex=self.ttl)
+        self._local = (version, body)
+        return body
+
+    async def _build(self) -> str:
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hgetall(SERVICES_KEY)
+            pipe.hgetall(INCIDENTS_KEY)
+            pipe.hget(VERSIONS_KEY, "status_at")
+            services, incidents, updated_at = await pipe.execute()
+        return (
+            '{"services":[' + ",".join(_by_id(services))
+            + '],"incidents":[' + ",".join(_by_id(incidents))
+            + '],"updated_at":"' + (updated_at or datetime.utcnow().isoformat()) + '"}'
+        )
+
+    async def _load(self, db: AsyncSession):
+        """
+        Rebuild the hashes from the database. VERSIONS_KEY is WATCHed across
+        the queries, so a write that lands meanwhile aborts the load and it
+        is retried against fresh data instead of being overwritten.
+        """
+        while True:
+            async with self.redis.pipeline(transaction=True) as pipe:
+                await pipe.watch(VERSIONS_KEY)
+                services = (await db.execute(select(Service))).scalars().all()
+                incidents = (
+                    await db.execute(
+                        select(Incident)
+                        .options(selectinload(Incident.services))
+                        .filter(Incident.status != "resolved")
+                    )
+                ).scalars().all()
+
+                now = datetime.utcnow().isoformat()
+                pipe.multi()
+                pipe.delete(SERVICES_KEY, INCIDENTS_KEY, SNAPSHOT_KEY)
+                if services:
+                    pipe.hset(SERVICES_KEY, mapping={str(s.id): _encode_service(s) for s in services})
+                if incidents:
+                    pipe.hset(INCIDENTS_KEY, mapping={str(i.id): _encode_incident(i) for i in incidents})
+                pipe.hset(META_KEY, "loaded", 1)
+                for key in (SERVICES_KEY, INCIDENTS_KEY, META_KEY):
+                    pipe.expire(key, self.ttl)
+                # What we missed while cold is unknown, so every dataset moves on
+                for dataset in DATASETS:
+                    pipe.hincrby(VERSIONS_KEY, dataset, 1)
+                    pipe.hset(VERSIONS_KEY, f"{dataset}_at", now)
+                try:
+                    await pipe.execute()
+                except redis.WatchError:
+                    logger.info("Public status changed during cold load; retrying")
+                    continue
+            logger.info("Public status snapshot loaded from the database")
+            return
+
+    # ------------------------------------------------------------------
+    # Write path
+    # ------------------------------------------------------------------
+    async def _apply(self, changes: list[tuple[str, str, int, str | None]]):
+        """Apply (key, dataset, entity_id, encoded or None) changes in one transaction."""
+        now = datetime.utcnow().isoformat()
+        datasets = {"status"} | {dataset for _, dataset, _, _ in changes}
+        try:
+            async with self.redis.pipeline(transaction=True) as pipe:
+                for key, _, entity_id, encoded in changes:
+                    if encoded is None:
+                        pipe.hdel(key, str(entity_id))
+                    else:
+                        pipe.hset(key, str(entity_id), encoded)
+                for name in datasets:
+                    pipe.hincrby(VERSIONS_KEY, name, 1)
+                    pipe.hset(VERSIONS_KEY, f"{name}_at", now)
+                await pipe.execute()
+        except redis.RedisError as e:
+            # The DB write already succeeded; the TTL bounds how long we drift.
+            logger.error(f"Failed to update public status snapshot: {e}")
+
+    @staticmethod
+    def _incident_entry(incident: Incident | None) -> str | None:
+        # Only unresolved incidents are part of the public status, but every
+        # change moves the "incidents" version (/public/incidents lists
+        # resolved ones too).
+        if incident is None or incident.status == "resolved":
+            return None
+        return _encode_incident(incident)
+
+    async def apply_events(self, db: AsyncSession, events: list[dict]):
+        """
+        Re-read every service/incident a batch of events refers to and
+        patch their entries in one transaction. Entities that no longer
+        exist are removed.
+        """
+        service_ids = {e["id"] for e in events if e.get("event_type") == "service" and "id" in e}
+        incident_ids = {e["id"] for e in events if e.get("event_type") == "incident" and "id" in e}
+        changes = []
+        if service_ids:
+            rows = await db.execute(select(Service).filter(Service.id.in_(service_ids)))
+            found = {s.id: s for s in rows.scalars()}
+            changes += [
+                (SERVICES_KEY, "services", sid, _encode_service(found[sid]) if sid in found else None)
+                for sid in sorted(service_ids)
+            ]
+        if incident_ids:
+            rows = await db.execute(
+                select(Incident).options(selectinload(Incident.services)).filter(Incident.id.in_(incident_ids))
+            )
+            found = {i.id: i for i in rows.scalars()}
+            changes += [
+                (INCIDENTS_KEY, "incidents", iid, self._incident_entry(found.get(iid)))
+                for iid in sorted(incident_ids)
+            ]
+        if changes:
+            await self._apply(changes)
+
+
+status_cache = StatusCache(redis_client, ttl=settings.PUBLIC_STATUS_CACHE_TTL)
@@ -0,0 +1,66 @@
+"""
+Cache of already-verified Clerk tokens.
+
+A bearer token is presented many times during its lifetime, and each RS256
+signature check is far more expensive than a dict lookup. Verified claims
+are kept in a bounded LRU keyed by the token's SHA-256 digest, so raw
+tokens are never held in memory. Each entry is dropped once the token's
+`exp` has passed.
+"""
+
+import hashlib
+import time
+from collections import OrderedDict
+
+
+class VerifiedTokenCache:
+    def __init__(self, maxsize: int = 10000):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[bytes, tuple[float, dict]] = OrderedDict()
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> dict | None:
+        key = self._key(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, claims = entry
+        if expires_at <= time.time():
+            del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return claims
+
+    def put(self, token: str, claims: dict):
+        # Tokens without an exp are never cached: we could not evict them.
+        exp = claims.get("exp")
+        if not self.maxsize or not isinstance(exp, (int, float)):
+            return
+        key = self._key(token)
+        self._entries[key] = (float(exp), claims)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+        }
@@ -0,0 +1,147 @@
+"""
+Time-weighted uptime per service per day.
+
+Every ServiceStatusUpdate row is a transition: the service has that status
+until its next row. Closed intervals are already summed per service and
+UTC day in service_status_daily (see core/rollups.py), so a 90-day window
+reads at most 90 rollup rows per service plus each service's latest
+transition. The interval that is still open is swept on the fly: cut at
+midnight, and each piece's duration added to its day, weighted by how
+available that status is.
+
+Time before a service's first known status is not counted, so a service
+added last week is not penalized for the weeks it did not exist. Services
+with no history at all are assumed to have had their current status since
+they were created.
+"""
+
+from datetime import datetime, time, timedelta, timezone
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.rollups import STATES, latest_transitions
+from models.service import Service, ServiceStatusDaily
+
+# Share of the time in a status that counts as "up". A partial outage
+# counts as 30% downtime, the common status-page convention.
+STATUS_WEIGHTS = {
+    "operational": 1.0,
+    "degraded": 1.0,
+    "partial_outage": 0.7,
+    "major_outage": 0.0,
+}
+
+# Severity order, for the colour of a day's bar
+SEVERITY = list(STATES)
+
+MAX_DAYS = 90
+DAY = 86400.0
+
+
+def _utc(dt: datetime) -> datetime:
+    # SQLite hands back naive datetimes; everything is stored as UTC
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt.astimezone(timezone.utc)
+
+
+def window(days: int, now: datetime | None = None) -> tuple[datetime, datetime]:
+    """The last `days` UTC days, today included, ending at `now`."""
+    now = _utc(now or datetime.now(timezone.utc))
+    start = datetime.combine(now.date() - timedelta(days=days - 1), time.min, tzinfo=timezone.utc)
+    return start, now
+
+
+async def _daily(db: AsyncSession, service_ids, start: datetime, end: datetime):
+    """(service_id, day, seconds per state...) rollup rows inside the window."""
+    columns = [getattr(ServiceStatusDaily, f"{state}_seconds") for state in STATES]
+    stmt = select(ServiceStatusDaily.service_id, ServiceStatusDaily.day, *columns).filter(
+        ServiceStatusDaily.day >= start.date(), ServiceStatusDaily.day <= end.date(),
+    )
+    if service_ids is not None:
+        stmt = stmt.filter(ServiceStatusDaily.service_id.in_(service_ids))
+    return (await db.execute(stmt)).all()
+
+
+def _sweep(points, end: float, days: int):
+    """
+    Accumulate (up seconds, observed seconds, worst severity) per day.
+    `points` are (seconds since the window start, status), in time order.
+    """
+    up = [0.0] * days
+    seen = [0.0] * days
+    worst = [-1] * days
+    for i, (at, status) in enumerate(points):
+        seg_start = max(at, 0.0)
+        seg_end = points[i + 1][0] if i + 1 < len(points) else end
+        weight = STATUS_WEIGHTS.get(status, 1.0)
+        severity = SEVERITY.index(status) if status in SEVERITY else 0
+        while seg_start < seg_end:
+            day = int(seg_start // DAY)
+            chunk_end = min(seg_end, (day + 1) * DAY)
+            seconds = chunk_end - seg_start
+            up[day] += seconds * weight
+            seen[day] += seconds
+            if severity > worst[day]:
+                worst[day] = severity
+            seg_start = chunk_end
+    return up, seen, worst
+
+
+def _percent(up: float, seen: float) -> float | None:
+    return round(100 * up / seen, 3) if seen else None
+
+
+async def service_uptime(
+        db: AsyncSession,
+        service_ids: list[int] | None = None,
+        days: int = MAX_DAYS,
+        now: datetime | None = None,
+) -> list[dict]:
+    """
+    Uptime of the given services (all of them for None) over the last
+    `days` days: an overall percentage and one entry per day, oldest first.
+    """
+    start, end = window(days, now)
+    stmt = select(Service.id, Service.current_status, Service.created_at).order_by(Service.id)
+    if service_ids is not None:
+        stmt = stmt.filter(Service.id.in_(service_ids))
+    services = (await db.execute(stmt)).all()
+
+    # Plain seconds since the window start from here on; float arithmetic
+    # is far cheaper than datetime arithmetic.
+    origin = start.timestamp()
+    end_offset = end.timestamp() - origin
+    open_since = {
+        service_id: (_utc(at).timestamp() - origin, status)
+        for service_id, at, status in await latest_transitions(db, service_ids, end)
+    }
+    closed: dict[int, list] = {}
+    for service_id, day, *seconds in await _daily(db, service_ids, start, end):
+        closed.setdefault(service_id, []).append(((day - start.date()).days, seconds))
+
+    dates = [start.date() + timedelta(days=d) for d in range(days)]
+    results = []
+    for service_id, current_status, created_at in services:
+        latest = open_since.get(service_id)
+        if latest is None and created_at is not None:
+            latest = (_utc(created_at).timestamp() - origin, current_status)
+        up, seen, worst = _sweep([latest] if latest else [], end_offset, days)
+        for d, seconds in closed.get(service_id, ()):
+            for severity, state in enumerate(STATES):
+                if seconds[severity] > 0:
+                    up[d] += seconds[severity] * STATUS_WEIGHTS[state]
+                    seen[d] += seconds[severity]
+                    worst[d] = max(worst[d], severity)
+        results.append({
+            "service_id": service_id,
+            "uptime": _percent(sum(up), sum(seen)),
+            "days": [
+                {
+                    "date": day,
+                    "uptime": _percent(up[d], seen[d]),
+                    "worst_status": SEVERITY[worst[d]] if worst[d] >= 0 else None,
+                }
+                for d, day in enumerate(dates)
+            ],
+        })
+    return results
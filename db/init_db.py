@@ -1,5 +1,4 @@
 import logging
-from sqlalchemy.ext.declarative import declarative_base
 from db.base import Base
 from db.session import engine
 
@@ -8,12 +7,13 @@ from models import Organization, User, Team, Service, Incident
 
 logger = logging.getLogger(__name__)
 
-def init_db() -> None:
+async def init_db() -> None:
     """Initialize the database, creating all tables."""
     try:
         # Create all tables
-        Base.metadata.create_all(bind=engine)
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
         logger.info("Database tables created successfully")
     except Exception as e:
         logger.error(f"Error creating database tables: {e}")
-        raise
\ No newline at end of file
+        raise
@@ -0,0 +1,152 @@
+"""
+Per-request database instrumentation.
+
+instrument(engine) hooks the engine's cursor events and times every
+statement. Statements executed while a request is being handled are added
+to that request's RequestStats (query count, total DB time and the slowest
+statement), which lives in a ContextVar so concurrent requests never mix.
+ServerTimingMiddleware (api/server_timing.py) opens the stats for each HTTP
+request and reports them.
+
+Statements slower than SLOW_QUERY_MS are logged whether or not a request is
+active. With SLOW_QUERY_EXPLAIN on, the plan is fetched on a second cursor of
+the same connection and logged with them. This is plain EXPLAIN, never
+ANALYZE, so the statement is not run twice.
+"""
+
+import logging
+import time
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from core import metrics
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+EXPLAIN_PREFIX = {"postgresql": "EXPLAIN ", "sqlite": "EXPLAIN QUERY PLAN "}
+
+# A failed EXPLAIN aborts the surrounding PostgreSQL transaction, so only
+# statements EXPLAIN accepts are explained (no DDL, SET, ...)
+EXPLAINABLE = ("select", "insert", "update", "delete", "with")
+
+
+class RequestStats:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.slowest_time = 0.0
+        self.slowest_statement: str | None = None
+
+    def add(self, statement: str, elapsed: float):
+        self.queries += 1
+        self.db_time += elapsed
+        if elapsed > self.slowest_time:
+            self.slowest_time = elapsed
+            self.slowest_statement = statement
+
+    def fields(self) -> dict:
+        """Structured log fields, times in milliseconds."""
+        return {
+            "duration_ms": round((time.perf_counter() - self.started) * 1000, 2),
+            "db_queries": self.queries,
+            "db_ms": round(self.db_time * 1000, 2),
+            "db_slowest_ms": round(self.slowest_time * 1000, 2),
+            "db_slowest_statement": self.slowest_statement[:200] if self.slowest_statement else None,
+        }
+
+
+_current: ContextVar[RequestStats | None] = ContextVar("request_stats", default=None)
+
+
+def begin_request() -> tuple[RequestStats, object]:
+    """Start collecting for the current request; pass the token to end_request()."""
+    stats = RequestStats()
+    return stats, _current.set(stats)
+
+
+def end_request(token):
+    _current.reset(token)
+
+
+def current_stats() -> RequestStats | None:
+    return _current.get()
+
+
+def _explain(conn, statement: str, parameters) -> str | None:
+    prefix = EXPLAIN_PREFIX.get(conn.dialect.name)
+    if prefix is None or not statement.lstrip().lower().startswith(EXPLAINABLE):
+        return None
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        cursor.execute(prefix + statement, parameters)
+        return "\n".join(" ".join(str(col) for col in row) for row in cursor.fetchall())
+    except Exception as e:
+        return f"(EXPLAIN failed: {e})"
+    finally:
+        cursor.close()
+
+
+def _before(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_started"].pop()
+    stats = _current.get()
+    if stats is not None:
+        stats.add(statement, elapsed)
+
+    if settings.SLOW_QUERY_MS and elapsed * 1000 >= settings.SLOW_QUERY_MS:
+        plan = None
+        if settings.SLOW_QUERY_EXPLAIN and not executemany:
+            plan = _explain(conn, statement, parameters)
+        logger.warning(
+            f"Slow query ({elapsed * 1000:.1f} ms): {statement}" + (f"\n{plan}" if plan else ""),
+            extra={"db_ms": round(elapsed * 1000, 2), "statement": statement, "plan": plan},
+        )
+
+
+def _failed(context):
+    # after_cursor_execute does not fire for a failed statement
+    started = context.connection.info.get("query_started")
+    if started:
+        started.pop()
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """
+    The default async pool, timing how long each checkout waits for a free
+    connection. The pool has no event for the start of a checkout, so the
+    wait is measured around _do_get().
+    """
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            metrics.db_pool_checkout_wait.observe(time.perf_counter() - started)
+
+
+def _checkout(dbapi_connection, connection_record, connection_proxy):
+    metrics.db_pool_in_use.inc()
+
+
+def _checkin(dbapi_connection, connection_record):
+    metrics.db_pool_in_use.dec()
+
+
+def instrument(engine: Engine):
+    """Attach the timing hooks to a (sync) engine; for an AsyncEngine pass engine.sync_engine."""
+    event.listen(engine, "before_cursor_execute", _before)
+    event.listen(engine, "after_cursor_execute", _after)
+    event.listen(engine, "handle_error", _failed)
+    event.listen(engine, "checkout", _checkout)
+    event.listen(engine, "checkin", _checkin)
+    if hasattr(engine.pool, "size"):
+        metrics.db_pool_size.set(engine.pool.size())
@@ -0,0 +1,77 @@
+"""
+Per-request SQL query budgets.
+
+Detail endpoints declare how many statements they may issue, e.g.
+
+    @router.get("/{id}", dependencies=[Depends(query_budget(2))])
+
+and every statement executed on the engine while the request runs is
+counted. A request over budget raises QueryBudgetExceeded when
+QUERY_BUDGET_ENFORCE is on (DEBUG, or the QUERY_BUDGET_ENFORCE environment
+variable), so an N+1 introduced by a new relationship or response field
+fails loudly instead of shipping; in production it is only logged.
+benchmarks/endpoints.py runs every budgeted route with enforcement on.
+
+Statements are counted on every engine, so a get_db override pointing at
+another database is held to the same budgets. The count lives in a
+ContextVar, so concurrent requests never see each other's statements.
+"""
+
+import logging
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+        self.statements: list[str] = []
+
+
+_current: ContextVar[QueryCounter | None] = ContextVar("query_counter", default=None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _count(conn, cursor, statement, parameters, context, executemany):
+    counter = _current.get()
+    if counter is not None:
+        counter.count += 1
+        counter.statements.append(statement)
+
+
+class count_queries:
+    """Count the statements executed inside the block: `with count_queries() as c:`."""
+
+    def __enter__(self) -> QueryCounter:
+        self.counter = QueryCounter()
+        self._token = _current.set(self.counter)
+        return self.counter
+
+    def __exit__(self, *exc):
+        _current.reset(self._token)
+
+
+def query_budget(limit: int):
+    """Dependency enforcing at most `limit` statements for the request."""
+
+    async def dependency():
+        with count_queries() as counter:
+            yield counter
+        if counter.count <= limit:
+            return
+        message = f"{counter.count} queries issued, budget is {limit}"
+        if settings.QUERY_BUDGET_ENFORCE:
+            raise QueryBudgetExceeded(message + ":\n" + "\n".join(counter.statements))
+        logger.warning(f"Query budget exceeded: {message}")
+
+    return dependency
@@ -1,16 +1,42 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
 from core.config import settings
+from db.instrumentation import InstrumentedPool, instrument
 
-engine = create_engine(settings.DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def _async_database_url(url: str):
+    """
+    Point a plain postgresql:// URL at the asyncpg driver.
+
+    asyncpg does not understand libpq's `sslmode` query parameter, so it is
+    translated into the `ssl` connect argument instead.
+    """
+    db_url = make_url(url)
+    connect_args = {}
+    if db_url.drivername in ("postgresql", "postgres", "postgresql+psycopg2"):
+        db_url = db_url.set(drivername="postgresql+asyncpg")
+    sslmode = db_url.query.get("sslmode")
+    if sslmode:
+        db_url = db_url.difference_update_query(["sslmode"])
+        connect_args["ssl"] = sslmode
+    return db_url, connect_args
+
+
+_db_url, _connect_args = _async_database_url(settings.DATABASE_URL)
+
+engine = create_async_engine(
+    _db_url, connect_args=_connect_args, pool_pre_ping=True, poolclass=InstrumentedPool,
+)
+instrument(engine.sync_engine)
+SessionLocal = async_sessionmaker(
+    bind=engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
 
 # Dependency to get DB session
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
\ No newline at end of file
@@ -2,13 +2,29 @@ import logging
 import asyncio
 import json
 
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 import redis.asyncio as redis
+from sqlalchemy.exc import SQLAlchemyError
 
 from dotenv import load_dotenv
 from core.config import settings
+from core import metrics
+from core.auth import jwks
+from core.broadcaster import Connection, Subscription, broadcaster
+from core.channels import ChannelSubscriptions
+from core.coalescer import coalescer
+from core.deltas import PROTOCOLS, snapshots
+from core.event_log import GapTooLarge, event_log
+from core.history import history_compactor
+from core.outbox import outbox_relay
+from core.sse import SSEStream
+from core.events import Frame, InvalidEvent
 from db.init_db import init_db
+from db.session import SessionLocal, engine
+from api.request_metrics import RequestMetricsMiddleware
+from api.server_timing import ServerTimingMiddleware
 from api.routes import (
     health_router,
     services_router,
@@ -17,6 +33,7 @@ from api.routes import (
     incident_router,
     users_router,
     public_router,
+    metrics_router,
 )
 
 load_dotenv(dotenv_path=".env.local", override=True)
@@ -39,11 +56,19 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
-# Globals for Redis and connected WebSockets
+# Per-request DB time and query count, as Server-Timing and log fields
+if settings.SERVER_TIMING:
+    app.add_middleware(ServerTimingMiddleware)
+
+# Prometheus metrics at /metrics
+if settings.METRICS_ENABLED:
+    app.add_middleware(RequestMetricsMiddleware)
+
+# Global Redis client; connected WebSockets live in the broadcaster
 redis_client: redis.Redis | None = None
-connected_websockets: list[WebSocket] = []
 
 
 @app.on_event("startup")
@@ -52,7 +77,7 @@ async def startup_event():
     Initialize DB, Redis, and start the Redis Pub/Sub listener.
     """
     # 1. Initialize the database
-    init_db()
+    await init_db()
     logger.info("Database initialized")
 
     # 2. Connect to Redis
@@ -68,67 +93,242 @@ async def startup_event():
     # 3. Launch the Redis‐subscribe loop in the background
     asyncio.create_task(_redis_listener())
 
+    # 4. Keep the Clerk signing keys warm
+    jwks.start()
+
+    # 5. Publish committed events from the outbox
+    outbox_relay.start()
+
+    # 6. Keep the raw status history small
+    history_compactor.start()
+
 
 @app.on_event("shutdown")
 async def shutdown_event():
-    """Clean up Redis on shutdown."""
+    """Clean up Redis and the database pool on shutdown."""
     global redis_client
+    await outbox_relay.aclose()
+    await history_compactor.aclose()
     if redis_client:
         await redis_client.close()
         logger.info("Redis connection closed")
 
+    await engine.dispose()
+    logger.info("Database connections closed")
+
+    await jwks.aclose()
+    metrics.mark_process_dead()
+
 
 @app.websocket("/ws")
 async def websocket_endpoint(ws: WebSocket):
     """
-    Accept a client WebSocket, keep it open until they disconnect,
-    and remove from our list on disconnect.
+    Accept a client WebSocket, register it with the broadcaster and
+    keep it open until they disconnect.
+
+    Clients that offer the "msgpack" subprotocol (or pass ?format=msgpack)
+    receive binary msgpack frames instead of JSON text.
+
+    By default a client receives every event. It can narrow that with
+    ?organization_id=..&service_id=..&event_type=.. (repeated or
+    comma-separated) and later adjust it by sending
+    {"action": "subscribe" | "unsubscribe", "organization_ids": [..],
+     "service_ids": [..], "event_types": [..]}.
+
+    The first frame is a "snapshot" of the public services and open
+    incidents (within the subscription), unless ?snapshot=0 is passed. With
+    ?protocol=delta, later frames only carry the fields that changed; see
+    core/deltas.py.
+
+    Every event carries an "event_id". A client reconnecting with
+    ?last_event_id=.. is first replayed the events it missed; if that gap is
+    no longer (or too much) in the event log it gets a fresh snapshot, or a
+    "resync" event telling it to refetch /public/status with ?snapshot=0.
     """
-    await ws.accept()
-    connected_websockets.append(ws)
+    subprotocol = "msgpack" if "msgpack" in ws.scope.get("subprotocols", []) else None
+    frame_format = "msgpack" if subprotocol or ws.query_params.get("format") == "msgpack" else "json"
+    protocol = ws.query_params.get("protocol", "full")
+    try:
+        subscription = Subscription.from_query(ws.query_params)
+        if protocol not in PROTOCOLS:
+            raise ValueError(f"Unknown protocol: {protocol!r}")
+    except ValueError:
+        # 1008 = policy violation
+        await ws.close(code=1008, reason="Invalid subscription parameters")
+        return
+
+    last_event_id = ws.query_params.get("last_event_id")
+    snapshot = ws.query_params.get("snapshot") != "0"
+
+    await ws.accept(subprotocol=subprotocol)
+    # Live events that arrive while the replay/snapshot is read are held
+    # back, so nothing is lost or delivered twice between the two.
+    conn = broadcaster.connect(
+        ws,
+        frame_format,
+        subscription,
+        hold=snapshot or last_event_id is not None,
+        deltas=protocol == "delta",
+    )
     logger.info(f"WebSocket client connected: {ws.client}")
 
     try:
+        await _catch_up(conn, last_event_id, snapshot)
         while True:
-            # We don't expect clients to send data; this just waits until they disconnect.
-            await ws.receive_text()
+            await _handle_client_message(conn, await ws.receive_text())
     except WebSocketDisconnect:
         logger.info(f"WebSocket client disconnected: {ws.client}")
     except Exception as e:
         logger.error(f"WebSocket error with {ws.client}: {e}")
     finally:
-        if ws in connected_websockets:
-            connected_websockets.remove(ws)
+        await broadcaster.disconnect(conn)
+
+
+@app.get("/events")
+async def event_stream(request: Request):
+    """
+    Server-Sent Events twin of /ws, for clients behind proxies that do not
+    handle WebSockets well. Takes the same ?organization_id=, ?service_id=,
+    ?event_type= and ?snapshot= parameters and sends the same JSON events,
+    each with its event_id as the SSE id. Resumes from the Last-Event-ID
+    header that EventSource sends on reconnect (or ?last_event_id=), and
+    sends a comment every SSE_KEEPALIVE_INTERVAL seconds to keep idle
+    proxies from closing the stream.
+    """
+    try:
+        subscription = Subscription.from_query(request.query_params)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid subscription parameters")
+
+    last_event_id = request.headers.get("last-event-id") or request.query_params.get("last_event_id")
+    snapshot = request.query_params.get("snapshot") != "0"
+
+    async def body():
+        stream = SSEStream(request.client)
+        conn = broadcaster.connect(
+            stream, "sse", subscription, hold=snapshot or last_event_id is not None,
+        )
+        logger.info(f"SSE client connected: {request.client}")
+        try:
+            yield f"retry: {settings.SSE_RETRY_MS}\n\n"
+            await _catch_up(conn, last_event_id, snapshot)
+            async for chunk in stream.chunks(settings.SSE_KEEPALIVE_INTERVAL):
+                yield chunk
+        finally:
+            logger.info(f"SSE client disconnected: {request.client}")
+            await broadcaster.disconnect(conn)
+
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream",
+        # Stop proxies (nginx in particular) from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def _catch_up(conn: Connection, last_event_id: str | None, snapshot: bool):
+    """Replay what a resuming client missed, else send it a snapshot."""
+    if last_event_id is not None and await _replay(conn, last_event_id):
+        return
+    if snapshot and await _send_snapshot(conn):
+        return
+    conn.resume([])
+    # The client cannot trust its state any more
+    if last_event_id is not None or conn.deltas:
+        conn.enqueue(Frame.from_event({"event_type": "resync", "last_event_id": last_event_id}))
+
+
+async def _replay(conn: Connection, last_event_id: str) -> bool:
+    try:
+        entries = await event_log.read_after(last_event_id, settings.EVENT_LOG_REPLAY_LIMIT)
+    except GapTooLarge:
+        return False
+    except redis.RedisError as e:
+        logger.error(f"Event replay failed: {e}")
+        return False
+
+    frames = []
+    for _, data in entries:
+        try:
+            frame = Frame.from_raw(data)
+        except InvalidEvent:
+            continue
+        if conn.subscription.matches(frame):
+            frames.append(frame)
+    conn.resume(frames)
+    logger.info(f"Replayed {len(frames)} events to {conn.ws.client}")
+    return True
+
+
+async def _send_snapshot(conn: Connection) -> bool:
+    try:
+        # Read before the snapshot: the outbox relay updates the cache before
+        # it publishes, so everything up to this id is in the snapshot.
+        event_id = await event_log.last_event_id()
+        async with SessionLocal() as db:
+            frame = await snapshots.frame(db, conn.subscription, event_id)
+    except (redis.RedisError, SQLAlchemyError) as e:
+        logger.error(f"WebSocket snapshot failed: {e}")
+        return False
+    conn.resume([frame])
+    return True
+
+
+async def _handle_client_message(conn: Connection, text: str):
+    """Apply a subscription change and acknowledge it on the socket."""
+    try:
+        subscription = conn.subscription.updated(json.loads(text))
+    except (ValueError, TypeError, AttributeError) as e:
+        conn.enqueue(Frame.from_event({"event_type": "error", "detail": str(e)}))
+        return
+
+    broadcaster.subscribe(conn, subscription)
+    conn.enqueue(Frame.from_event({"event_type": "subscription", **subscription.to_dict()}))
+    if conn.deltas:
+        # Deltas for newly subscribed entities need a baseline
+        conn.hold()
+        await _catch_up(conn, None, snapshot=True)
 
 
 async def _redis_listener():
     """
-    Listen on the Redis "status_updates" channel and broadcast
-    each incoming message to all connected WebSocket clients.
+    Listen on the organization channels this worker's clients need and
+    hand each incoming message (through the coalescing window, if one is
+    configured) to the broadcaster, which queues it per client. Messages
+    are validated once and forwarded with their original encoding; nothing
+    is re-serialized per client.
     """
     if not redis_client:
         logger.error("Redis client not initialized; listener exiting.")
         return
 
     pubsub = redis_client.pubsub()
-    await pubsub.subscribe("status_updates")
-    logger.info("Subscribed to Redis channel: status_updates")
-
-    async for msg in pubsub.listen():
-        if msg.get("type") == "message":
-            try:
-                payload = json.loads(msg["data"])
-            except Exception as e:
-                logger.error(f"Invalid JSON in Redis message: {e}")
-                continue
-
-            for ws in connected_websockets.copy():
-                try:
-                    # Send the already-ISO-formatted JSON payload
-                    await ws.send_json(payload)
-                except Exception:
-                    connected_websockets.remove(ws)
-                    logger.info(f"Removed dead WebSocket: {ws.client}")
+    channels = ChannelSubscriptions(pubsub)
+    broadcaster.on_interest_change(channels.changed.set)
+
+    while True:
+        if channels.changed.is_set():
+            channels.changed.clear()
+            await channels.sync(broadcaster.interest())
+
+        if not pubsub.subscribed:
+            # No clients (or none that need Redis): idle until one connects
+            await channels.changed.wait()
+            continue
+
+        # Short timeout so subscription changes are picked up promptly
+        msg = await pubsub.get_message(ignore_subscribe_messages=True, timeout=0.25)
+        if not msg or msg.get("type") not in ("message", "pmessage"):
+            continue
+
+        try:
+            frame = Frame.from_raw(msg["data"])
+        except InvalidEvent as e:
+            logger.error(f"Invalid Redis message: {e}")
+            continue
+
+        # Non-blocking: each client's writer task drains its own queue
+        coalescer.add(frame)
 
 
 # Finally: include all your routers
@@ -139,3 +339,5 @@ app.include_router(team_router)
 app.include_router(incident_router)
 app.include_router(users_router)
 app.include_router(public_router)
+if settings.METRICS_ENABLED:
+    app.include_router(metrics_router)
@@ -0,0 +1,39 @@
+"""add outbox events
+
+Revision ID: 4b1e7c2a9f10
+Revises: d7cc237fdf63
+Create Date: 2026-10-18 10:12:40.118305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4b1e7c2a9f10'
+down_revision: Union[str, None] = 'd7cc237fdf63'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('outbox_events',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('channel', sa.String(), nullable=False),
+    sa.Column('payload', sa.Text(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('sent_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_outbox_events_unsent', 'outbox_events', ['id'], unique=False, postgresql_where=sa.text('sent_at IS NULL'))
+    op.create_index('ix_outbox_events_sent_at', 'outbox_events', ['sent_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_outbox_events_sent_at', table_name='outbox_events')
+    op.drop_index('ix_outbox_events_unsent', table_name='outbox_events')
+    op.drop_table('outbox_events')
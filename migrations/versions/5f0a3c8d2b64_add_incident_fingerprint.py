@@ -0,0 +1,30 @@
+"""add incident fingerprint
+
+Revision ID: 5f0a3c8d2b64
+Revises: e2a8b4f61c37
+Create Date: 2026-10-18 13:05:12.284417
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5f0a3c8d2b64'
+down_revision: Union[str, None] = 'e2a8b4f61c37'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('incidents', sa.Column('fingerprint', sa.String(), nullable=True))
+    op.create_index('ux_incidents_open_fingerprint', 'incidents', ['fingerprint'], unique=True, postgresql_where=sa.text("status != 'resolved'"), sqlite_where=sa.text("status != 'resolved'"))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ux_incidents_open_fingerprint', table_name='incidents')
+    op.drop_column('incidents', 'fingerprint')
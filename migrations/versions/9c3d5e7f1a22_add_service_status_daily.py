@@ -0,0 +1,58 @@
+"""add service_status_daily rollups
+
+Revision ID: 9c3d5e7f1a22
+Revises: 4b1e7c2a9f10
+Create Date: 2026-10-18 11:02:17.503921
+
+Creates the daily rollup table and backfills it from the existing
+service_status_updates rows. The backfill streams the history once, in
+(service_id, created_at) order, and inserts in chunks; re-running it
+(downgrade + upgrade) rebuilds the table from scratch.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from core.rollups import daily_seconds, rollup_rows
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c3d5e7f1a22'
+down_revision: Union[str, None] = '4b1e7c2a9f10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+CHUNK = 1000
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    daily = op.create_table('service_status_daily',
+    sa.Column('service_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('operational_seconds', sa.Float(), nullable=False),
+    sa.Column('degraded_seconds', sa.Float(), nullable=False),
+    sa.Column('partial_outage_seconds', sa.Float(), nullable=False),
+    sa.Column('major_outage_seconds', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['service_id'], ['services.id'], ),
+    sa.PrimaryKeyConstraint('service_id', 'day')
+    )
+    backfill(daily)
+
+
+def backfill(daily: sa.Table) -> None:
+    conn = op.get_bind()
+    history = conn.execution_options(stream_results=True).execute(sa.text(
+        "SELECT service_id, created_at, status FROM service_status_updates "
+        "WHERE service_id IS NOT NULL AND created_at IS NOT NULL "
+        "ORDER BY service_id, created_at, id"
+    ))
+    rows = rollup_rows(daily_seconds(history))
+    for i in range(0, len(rows), CHUNK):
+        op.bulk_insert(daily, rows[i:i + CHUNK])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('service_status_daily')
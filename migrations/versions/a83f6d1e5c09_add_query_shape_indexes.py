@@ -0,0 +1,60 @@
+"""add composite and partial indexes for the hot query shapes
+
+Revision ID: a83f6d1e5c09
+Revises: 5f0a3c8d2b64
+Create Date: 2026-10-18 14:10:37.905126
+
+The indexes match how the API actually reads: keyset pages ordered by
+(created_at DESC, id DESC) within a parent or organization, and open
+incidents only. On PostgreSQL they are built CONCURRENTLY, outside the
+migration transaction, so writes to these tables are not blocked while
+they build. benchmarks/explain_indexes.py checks the plans they produce.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a83f6d1e5c09'
+down_revision: Union[str, None] = '5f0a3c8d2b64'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+OPEN = sa.text("status != 'resolved'")
+
+# (name, table, columns, partial-index predicate)
+INDEXES = [
+    ('ix_service_status_updates_service_created', 'service_status_updates',
+     ['service_id', sa.text('created_at DESC'), sa.text('id DESC')], None),
+    ('ix_incident_updates_incident_created', 'incident_updates',
+     ['incident_id', sa.text('created_at DESC'), sa.text('id DESC')], None),
+    ('ix_incidents_open_created', 'incidents',
+     [sa.text('created_at DESC'), sa.text('id DESC')], OPEN),
+    ('ix_incidents_org_created', 'incidents',
+     ['organization_id', sa.text('created_at DESC'), sa.text('id DESC')], None),
+    ('ix_services_org_created', 'services',
+     ['organization_id', sa.text('created_at DESC'), sa.text('id DESC')], None),
+    ('ix_teams_org_created', 'teams',
+     ['organization_id', sa.text('created_at DESC'), sa.text('id DESC')], None),
+    ('ix_incident_services_service_incident', 'incident_services', ['service_id', 'incident_id'], None),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in INDEXES:
+            op.create_index(
+                name, table, columns, unique=False,
+                postgresql_where=where, sqlite_where=where,
+                postgresql_concurrently=True, if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,28 @@
+"""add outbox event error
+
+Revision ID: c41d9e2b7a58
+Revises: a83f6d1e5c09
+Create Date: 2026-10-18 16:42:37.519204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c41d9e2b7a58'
+down_revision: Union[str, None] = 'a83f6d1e5c09'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('outbox_events', sa.Column('error', sa.Text(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('outbox_events', 'error')
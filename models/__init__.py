@@ -1,8 +1,9 @@
 from models.organization import Organization
 from models.user import User, TeamMember
 from models.team import Team
-from models.service import Service, ServiceStatusUpdate, team_services
+from models.service import Service, ServiceStatusUpdate, ServiceStatusDaily, ServiceStatusUpdateArchive, team_services
 from models.incident import Incident, IncidentUpdate, incident_services
+from models.outbox import OutboxEvent
 
 __all__ = [
     "Organization",
@@ -11,8 +12,11 @@ __all__ = [
     "Team",
     "Service",
     "ServiceStatusUpdate",
+    "ServiceStatusDaily",
+    "ServiceStatusUpdateArchive",
     "team_services",
     "Incident",
     "IncidentUpdate",
     "incident_services",
+    "OutboxEvent",
 ]
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, Table, Text
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, Table, Text, Index, text
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 
@@ -10,6 +10,8 @@ incident_services = Table(
     Base.metadata,
     Column("incident_id", Integer, ForeignKey("incidents.id"), primary_key=True),
     Column("service_id", Integer, ForeignKey("services.id"), primary_key=True),
+    # The primary key covers incident -> services; this is services -> incidents
+    Index("ix_incident_services_service_incident", "service_id", "incident_id"),
 )
 
 class Incident(Base):
@@ -28,6 +30,7 @@ class Incident(Base):
     resolved_at = Column(DateTime(timezone=True), nullable=True)
     scheduled_start = Column(DateTime(timezone=True), nullable=True)
     scheduled_end = Column(DateTime(timezone=True), nullable=True)
+    fingerprint = Column(String, nullable=True)  # caller-supplied alert identity, see POST /incidents/ingest
 
     # Relationships
     organization = relationship("Organization")
@@ -35,6 +38,27 @@ class Incident(Base):
     services = relationship("Service", secondary=incident_services, back_populates="incidents")
     updates = relationship("IncidentUpdate", back_populates="incident", order_by="desc(IncidentUpdate.created_at)")
 
+    __table_args__ = (
+        # Open incidents, newest first: the public status and its snapshot
+        Index(
+            "ix_incidents_open_created",
+            created_at.desc(),
+            id.desc(),
+            postgresql_where=text("status != 'resolved'"),
+            sqlite_where=text("status != 'resolved'"),
+        ),
+        # GET /incidents/?organization_id=, newest first
+        Index("ix_incidents_org_created", organization_id, created_at.desc(), id.desc()),
+        # At most one open incident per alert; a resolved one may fire again
+        Index(
+            "ux_incidents_open_fingerprint",
+            "fingerprint",
+            unique=True,
+            postgresql_where=text("status != 'resolved'"),
+            sqlite_where=text("status != 'resolved'"),
+        ),
+    )
+
 class IncidentUpdate(Base):
     __tablename__ = "incident_updates"
 
@@ -47,4 +71,9 @@ class IncidentUpdate(Base):
 
     # Relationships
     incident = relationship("Incident", back_populates="updates")
-    user = relationship("User")
\ No newline at end of file
+    user = relationship("User")
+
+    __table_args__ = (
+        # GET /incidents/{id}/updates and the updates of GET /incidents/{id}
+        Index("ix_incident_updates_incident_created", incident_id, created_at.desc(), id.desc()),
+    )
@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, Index
+from sqlalchemy.sql import func
+
+from db.base import Base
+
+class OutboxEvent(Base):
+    """
+    A status event written in the same transaction as the change it
+    describes, and published to Redis by the outbox relay (core/outbox.py)
+    once that transaction has committed.
+    """
+    __tablename__ = "outbox_events"
+
+    id = Column(Integer, primary_key=True)
+    channel = Column(String, nullable=False)
+    payload = Column(Text, nullable=False)  # the event, as JSON
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    sent_at = Column(DateTime(timezone=True), nullable=True)
+    # Set (with sent_at) when the relay gave up on a row it could not process
+    error = Column(Text, nullable=True)
+
+    __table_args__ = (
+        # The relay only ever scans unsent rows, oldest first
+        Index("ix_outbox_events_unsent", "id", postgresql_where=sent_at.is_(None)),
+        Index("ix_outbox_events_sent_at", "sent_at"),
+    )
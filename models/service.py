@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, Table
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, Table, Date, Float, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 
@@ -30,6 +30,11 @@ class Service(Base):
     status_updates = relationship("ServiceStatusUpdate", back_populates="service", order_by="desc(ServiceStatusUpdate.created_at)")
     incidents = relationship("Incident", secondary="incident_services", back_populates="services")
 
+    __table_args__ = (
+        # GET /services/?organization_id=, newest first
+        Index("ix_services_org_created", organization_id, created_at.desc(), id.desc()),
+    )
+
 class ServiceStatusUpdate(Base):
     __tablename__ = "service_status_updates"
 
@@ -43,4 +48,43 @@ class ServiceStatusUpdate(Base):
 
     # Relationships
     service = relationship("Service", back_populates="status_updates")
-    user = relationship("User")
\ No newline at end of file
+    user = relationship("User")
+
+    __table_args__ = (
+        # History pages, the previous status in record_status() and each
+        # service's latest transition for uptime
+        Index("ix_service_status_updates_service_created", service_id, created_at.desc(), id.desc()),
+    )
+
+class ServiceStatusDaily(Base):
+    """
+    Seconds each service spent in each status per UTC day, for closed
+    intervals only: a day gets its share of an interval once the status
+    that started it has been replaced (see core/rollups.py).
+    """
+    __tablename__ = "service_status_daily"
+
+    service_id = Column(Integer, ForeignKey("services.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    operational_seconds = Column(Float, nullable=False, default=0)
+    degraded_seconds = Column(Float, nullable=False, default=0)
+    partial_outage_seconds = Column(Float, nullable=False, default=0)
+    major_outage_seconds = Column(Float, nullable=False, default=0)
+
+class ServiceStatusUpdateArchive(Base):
+    """
+    Status history moved out of service_status_updates by the compaction job
+    (core/history.py): rows past the retention horizon, and repeats of the
+    status before them. Same columns, plus when and why each row was moved.
+    """
+    __tablename__ = "service_status_updates_archive"
+
+    id = Column(Integer, primary_key=True)
+    service_id = Column(Integer, index=True)
+    status = Column(String)
+    message = Column(String, nullable=True)
+    created_by = Column(Integer)
+    created_at = Column(DateTime(timezone=True))
+    updated_at = Column(DateTime(timezone=True))
+    archived_at = Column(DateTime(timezone=True), server_default=func.now())
+    reason = Column(String)  # expired, compacted
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 
@@ -18,4 +18,11 @@ class Team(Base):
     # Relationships
     organization = relationship("Organization", back_populates="teams")
     members = relationship("TeamMember", back_populates="team")
-    services = relationship("Service", secondary="team_services", back_populates="teams")
\ No newline at end of file
+    # The users behind `members`, in one hop; read-only, write through TeamMember
+    users = relationship("User", secondary="team_members", viewonly=True)
+    services = relationship("Service", secondary="team_services", back_populates="teams")
+
+    __table_args__ = (
+        # Every /organizations/{org_id}/teams route filters on the organization
+        Index("ix_teams_org_created", organization_id, created_at.desc(), id.desc()),
+    )
\ No newline at end of file
@@ -1,6 +1,6 @@
 # File: schemas/incident.py
 
-from pydantic import BaseModel, Field, ConfigDict
+from pydantic import BaseModel, Field, ConfigDict, field_validator
 from typing import Optional, List, Literal
 from datetime import datetime
 
@@ -28,6 +28,27 @@ class IncidentCreate(IncidentBase):
     service_ids: List[int] = []
 
 
+class IncidentIngest(IncidentCreate):
+    # Alerts with the same fingerprint collapse into one open incident
+    fingerprint: str = Field(..., min_length=1, max_length=255)
+
+
+class IncidentIngestResult(BaseModel):
+    index: int                      # position in the request body
+    result: Literal["created", "duplicate", "invalid"]
+    fingerprint: Optional[str] = None
+    id: Optional[int] = None        # set for created incidents
+    error: Optional[str] = None
+
+
+class IncidentIngestResponse(BaseModel):
+    received: int
+    created: int
+    duplicates: int
+    invalid: int
+    results: List[IncidentIngestResult]
+
+
 class IncidentUpdate(BaseModel):
     title: Optional[str] = Field(None, min_length=5, max_length=200)
     description: Optional[str] = None
@@ -59,6 +80,7 @@ class IncidentResponse(BaseResponse):
     resolved_at:      Optional[datetime] = None
     scheduled_start:  Optional[datetime] = None
     scheduled_end:    Optional[datetime] = None
+    fingerprint:      Optional[str] = None
     affected_services: List[int] = []
 
     model_config = ConfigDict(from_attributes=True)
@@ -76,10 +98,17 @@ class IncidentUpdateCreate(IncidentUpdateBase):
 
 class IncidentUpdateResponse(BaseResponse, IncidentUpdateBase):
     incident_id: int
-    created_by:  int
+    created_by:  Optional[int] = None
 
     model_config = ConfigDict(from_attributes=True)
 
 
 class IncidentWithUpdates(IncidentResponse):
     updates: List[IncidentUpdateResponse] = []
+    # Only the detail endpoint loads Incident.services; lists leave this empty
+    affected_services: List[int] = Field(default=[], validation_alias="services")
+
+    @field_validator("affected_services", mode="before")
+    @classmethod
+    def _service_ids(cls, services):
+        return [getattr(service, "id", service) for service in services or []]
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field, field_validator
 from typing import Optional, List
 from datetime import datetime
 
@@ -29,9 +29,20 @@ class PublicIncident(BaseModel):
 
     model_config = ConfigDict(from_attributes=True)
 
+class PublicStatusIncident(PublicIncident):
+    # The services an open incident affects. Every incident event carries
+    # the same ids, so a service-scoped /ws subscriber gets a snapshot of
+    # exactly the incidents it is sent live
+    service_ids: List[int] = Field(default=[], validation_alias="services")
+
+    @field_validator("service_ids", mode="before")
+    @classmethod
+    def _service_ids(cls, services):
+        return [getattr(service, "id", service) for service in services or []]
+
 class PublicStatus(BaseModel):
     services: List[PublicService]
-    incidents: List[PublicIncident]
+    incidents: List[PublicStatusIncident]
     updated_at: datetime
 
     model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field, ConfigDict
-from typing import Optional, Literal
-from datetime import datetime
+from typing import Optional, Literal, List
+from datetime import date, datetime
 from schemas import BaseResponse
 
 ServiceStatus = Literal[
@@ -50,7 +50,35 @@ class ServiceStatusHistoryResponse(BaseResponse):
     service_id: int
     status: ServiceStatus
     message: Optional[str] = None
-    created_by: int
+    created_by: Optional[int] = None
     created_at: datetime
 
     model_config = ConfigDict(from_attributes=True)
+
+class UptimeDay(BaseModel):
+    date: date
+    uptime: Optional[float] = None          # percent; None = no data that day
+    worst_status: Optional[ServiceStatus] = None
+
+class ServiceUptime(BaseModel):
+    service_id: int
+    uptime: Optional[float] = None          # percent over the whole window
+    days: List[UptimeDay]
+
+class BulkStatusItem(BaseModel):
+    service_id: int
+    status: ServiceStatus
+    message: Optional[str] = None
+
+class BulkStatusUpdate(BaseModel):
+    updates: List[BulkStatusItem] = Field(..., min_length=1, max_length=500)
+
+class BulkStatusResult(BaseModel):
+    service_id: int
+    ok: bool
+    current_status: Optional[ServiceStatus] = None
+    error: Optional[str] = None
+
+class BulkStatusResponse(BaseModel):
+    updated: int
+    results: List[BulkStatusResult]     # one per item, in request order
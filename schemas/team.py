@@ -35,4 +35,5 @@ class TeamMemberResponse(BaseResponse, TeamMemberBase):
     model_config = ConfigDict(from_attributes=True)
 
 class TeamWithMembers(TeamResponse):
-    members: List[UserResponse] = []
+    # Filled from Team.users: the members' user records, not the TeamMember rows
+    members: List[UserResponse] = Field(default=[], validation_alias="users")